@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Measure fsbcast.pl broadcast throughput against the number of nodes.
+
+For each node count N a test instance of N brokers is started on this host
+and fsbcast.pl copies a file of random data to all of them from inside an
+N node allocation:
+
+    flux start --test-size=N flux alloc -N N fsbcast.pl --force FILE DEST
+
+The copy is then repeated with --update, which finds every node up to date
+and only costs the check. Times are taken inside the allocation, so they do
+not include starting the instance. The throughput is the data delivered,
+the file size times N, per second.
+
+All the brokers share this host, and so DEST, so the figures reflect the
+distribution of the archive through the instance more than disk bandwidth.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRCDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Run in the allocation: time one copy and one --update check of FILE.
+SCRIPT = """
+fsbcast=$1 file=$2 dest=$3
+start=$(date +%s.%N)
+perl "$fsbcast" --force "$file" "$dest" || exit 1
+copied=$(date +%s.%N)
+perl "$fsbcast" --update "$file" "$dest" || exit 1
+checked=$(date +%s.%N)
+echo "$start $copied $checked"
+"""
+
+
+def run(nnodes, path, dest):
+    """
+    return the seconds taken by a copy of path to dest on nnodes brokers and
+    by the --update run that follows it
+    """
+    command = [
+        "flux",
+        "start",
+        f"--test-size={nnodes}",
+        "flux",
+        "alloc",
+        "-N",
+        str(nnodes),
+        "sh",
+        "-c",
+        SCRIPT,
+        "sh",
+        os.path.join(SRCDIR, "fsbcast.pl"),
+        path,
+        dest,
+    ]
+    output = subprocess.run(
+        command, stdout=subprocess.PIPE, check=True, text=True
+    ).stdout
+    start, copied, checked = (float(t) for t in output.split()[-3:])
+    return copied - start, checked - copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-N",
+        "--nodes",
+        type=lambda text: [int(count) for count in text.split(",")],
+        default=[1, 2, 4, 8, 16],
+        help="comma separated node counts (default: 1,2,4,8,16)",
+    )
+    parser.add_argument(
+        "-s", "--size", type=int, default=256, help="file size in MB (default: 256)"
+    )
+    parser.add_argument("-n", "--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if shutil.which("flux") is None:
+        sys.exit("bench_bcast.py: flux is not in PATH")
+
+    workdir = tempfile.mkdtemp(prefix="bench-bcast-")
+    try:
+        path = os.path.join(workdir, "data")
+        with open(path, "wb") as fp:
+            for _ in range(args.size):
+                fp.write(os.urandom(1 << 20))
+        print(
+            f"{'nodes':>5} {'MB':>6} {'copy s':>8} {'MB/s':>8} {'update s':>9}",
+            flush=True,
+        )
+        for nnodes in args.nodes:
+            times = [
+                run(nnodes, path, os.path.join(workdir, "dest"))
+                for _ in range(args.runs)
+            ]
+            copy = statistics.median(copy for copy, _ in times)
+            update = statistics.median(update for _, update in times)
+            print(
+                f"{nnodes:>5} {args.size:>6} {copy:>8.2f} "
+                f"{args.size * nnodes / copy:>8.1f} {update:>9.2f}",
+                flush=True,
+            )
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/bin/env -S flux python
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Measure squeue row rendering throughput of SlurmFormatter.
+
+Compares the original per-row regex parsing of the format string with
+rendering from a plan compiled once by SlurmFormatter.compile().
+"""
+
+import argparse
+import os.path
+import re
+import sys
+import time
+
+SRCDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRCDIR)
+
+from fluxwrappers.format import SlurmFormatter  # noqa: E402
+
+DEFAULT_FORMAT = "%.18i %.9P %.8j %.8u %.2t %.10M %.6D %R"
+
+
+def legacy_format(formatter, format_string, types_dict):
+    """
+    SlurmFormatter.format as it was before format plans: parse the format
+    string with re.finditer and re.match for every row.
+    """
+    result = []
+    prev_end = 0
+    for token in re.finditer(formatter.token_re, format_string):
+        prefix = format_string[prev_end : token.start()]
+        try:
+            width_match = re.match(formatter.token_pad_re, token.group()[1:])
+            if width_match is not None:
+                width_string = width_match.group()
+                output = types_dict[token.group().replace(width_string, "")]
+                if width_string[0] == ".":
+                    width = int(width_string[1:])
+                    output = f"{output:>{width}}"[:width]
+                else:
+                    width = int(width_string)
+                    output = f"{output:<{width}}"[:width]
+            else:
+                output = types_dict[token.group()]
+            result.append(prefix)
+            result.append(output)
+            prev_end = token.end()
+        except KeyError:
+            continue
+    result.append(format_string[prev_end:])
+    return "".join(result)
+
+
+def make_rows(count):
+    """
+    build job value dictionaries like those returned by get_job_dict()
+    """
+    rows = []
+    for i in range(count):
+        running = i % 3 == 0
+        rows.append(
+            {
+                "%": "",
+                "%a": f"user{i % 97}",
+                "%i": f"f{i + 1000000:x}",
+                "%P": "pbatch" if i % 5 else "pdebug",
+                "%j": f"job-{i % 1013}",
+                "%u": f"user{i % 97}",
+                "%t": "R" if running else "S",
+                "%M": f"{i % 60:02}:{i % 59:02}",
+                "%D": 1 + i % 64,
+                "%R": f"node[{i % 1000}-{i % 1000 + 3}]"
+                if running
+                else "insufficient resources",
+            }
+        )
+    return rows
+
+
+def run(label, render, rows):
+    start = time.perf_counter()
+    for row in rows:
+        render(row)
+    elapsed = time.perf_counter() - start
+    rate = len(rows) / elapsed
+    print(f"{label:<10} {len(rows):>8} rows {elapsed:>8.3f}s {rate:>12.0f} rows/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--rows", type=int, default=50000)
+    parser.add_argument("-o", "--format", default=DEFAULT_FORMAT)
+    args = parser.parse_args()
+
+    formatter = SlurmFormatter()
+    rows = make_rows(args.rows)
+
+    print(f"format: {args.format!r}")
+    before = run(
+        "before", lambda row: legacy_format(formatter, args.format, row), rows
+    )
+    plan = formatter.compile(args.format)
+    after = run("after", lambda row: formatter.render(plan, row), rows)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
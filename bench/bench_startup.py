@@ -0,0 +1,103 @@
+#!/bin/env -S flux python
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Measure the cold-start time of each Python wrapper entry point.
+
+Each wrapper is started in a fresh interpreter with an option that exits
+before contacting flux (--help, and -V for scancel), so the time measured is
+interpreter startup plus imports and argument parsing.
+
+With --server the same commands are also timed while a resident server
+(fluxwrappers/server.py) is running, so they are forwarded to it.
+"""
+
+import argparse
+import os.path
+import statistics
+import subprocess
+import sys
+import time
+
+SRCDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+ENTRY_POINTS = [
+    ("squeue", "fsqueue.py", ["--help"]),
+    ("showq", "fshowq.py", ["--help"]),
+    ("scancel", "fscancel.py", ["--help"]),
+    ("scancel -V", "fscancel.py", ["-Q", "-V"]),
+    ("sinfo", "fsinfo.py", ["--help"]),
+]
+
+
+def time_command(command, runs, env=None):
+    """
+    return the wall times in seconds of runs executions of command
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True, env=env)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def start_server():
+    """
+    start a resident server and return its process once it is listening
+    """
+    env = dict(os.environ, PYTHONPATH=SRCDIR)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "fluxwrappers.server", "--idle-timeout", "60"], env=env
+    )
+    sys.path.insert(0, SRCDIR)
+    from fluxwrappers.server import socket_path
+
+    path = socket_path()
+    for _ in range(100):
+        if os.path.exists(path):
+            return server
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"server did not start listening on {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=20)
+    parser.add_argument(
+        "--server", action="store_true", help="also time runs through the server"
+    )
+    args = parser.parse_args()
+
+    # Baseline: an interpreter that does nothing.
+    rows = [("python -c pass", time_command([sys.executable, "-c", "pass"], args.runs))]
+    env = dict(os.environ, FLUX_WRAPPERS_SERVER="0")
+    for name, script, argv in ENTRY_POINTS:
+        command = [sys.executable, os.path.join(SRCDIR, script)] + argv
+        rows.append((name, time_command(command, args.runs, env)))
+    if args.server:
+        server = start_server()
+        try:
+            for name, script, argv in ENTRY_POINTS:
+                command = [sys.executable, os.path.join(SRCDIR, script)] + argv
+                rows.append((f"{name} (server)", time_command(command, args.runs)))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'entry point':<25} {'min ms':>8} {'median ms':>10} {'max ms':>8}")
+    for name, times in rows:
+        print(
+            f"{name:<25} {min(times) * 1000:>8.1f} "
+            f"{statistics.median(times) * 1000:>10.1f} {max(times) * 1000:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Benchmark the Python wrappers against synthetic job tables.
+
+Each scenario runs one wrapper entry point in a fresh child process using the
+stand-in flux bindings from fakeflux.py, so no Flux instance is needed. For
+every invocation the wall time, peak RSS, number of requests sent and number
+of response bytes decoded are reported. For the sinfo scenarios the table
+size is the number of nodes instead of jobs.
+"""
+
+import argparse
+import json
+import os
+import resource
+import runpy
+import subprocess
+import sys
+import time
+
+BENCHDIR = os.path.dirname(os.path.abspath(__file__))
+SRCDIR = os.path.join(BENCHDIR, "..", "src")
+
+# name -> (script, argv)
+SCENARIOS = {
+    "squeue": ("fsqueue.py", []),
+    "squeue-all": ("fsqueue.py", ["-t", "all"]),
+    "squeue-running": ("fsqueue.py", ["-t", "r"]),
+    "squeue-user": ("fsqueue.py", ["-u", str(os.getuid())]),
+    "squeue-nodelist": ("fsqueue.py", ["-w", "node[0-63]"]),
+    "squeue-format": ("fsqueue.py", ["-o", "%i %t"]),
+    "squeue-ndjson": ("fsqueue.py", ["--ndjson"]),
+    "squeue-csv": ("fsqueue.py", ["--csv", "--fields", "job_id,job_state,run_time"]),
+    "showq": ("fshowq.py", []),
+    "showq-completed": ("fshowq.py", ["-c"]),
+    "scancel": ("fscancel.py", ["-Q", "-u", "all"]),
+    "sinfo": ("fsinfo.py", []),
+    "sinfo-node": ("fsinfo.py", ["-N"]),
+    "sinfo-reasons": ("fsinfo.py", ["-R"]),
+}
+
+
+def parse_states(text):
+    """
+    parse a state mix such as "sched=0.3,run=0.5,inactive=0.2"
+    """
+    states = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        states[name] = float(weight or 1)
+    return states
+
+
+def run_child(args):
+    """
+    Run one scenario in this process and print the measurements as JSON.
+    """
+    sys.path.insert(0, BENCHDIR)
+    sys.path.insert(0, SRCDIR)
+    import fakeflux
+
+    fakeflux.install()
+    script, argv = SCENARIOS[args.child]
+    if script == "fsinfo.py":
+        fakeflux.load_resources(*fakeflux.make_resources(args.jobs[0]))
+    else:
+        fakeflux.load(
+            fakeflux.make_jobs(
+                args.jobs[0], nnodes=args.nnodes, states=parse_states(args.states)
+            )
+        )
+    rss_table = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    path = os.path.join(SRCDIR, script)
+    sys.argv = [path] + argv
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    start = time.perf_counter()
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit:
+        pass
+    elapsed = time.perf_counter() - start
+    sys.stdout.close()
+    sys.stdout = stdout
+
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = dict(
+        fakeflux.STATS,
+        wall=elapsed,
+        rss_table_kb=rss_table,
+        rss_peak_kb=rss_peak,
+    )
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="scenario to run (may be repeated, default: all)",
+    )
+    parser.add_argument(
+        "-n",
+        "--jobs",
+        type=lambda text: [int(count) for count in text.split(",")],
+        default=[1000, 10000, 100000],
+        help="comma separated job table sizes (default: 1000,10000,100000)",
+    )
+    parser.add_argument(
+        "--nnodes", type=int, default=4, help="nodes per running job (default: 4)"
+    )
+    parser.add_argument(
+        "--states",
+        default="sched=0.3,run=0.5,inactive=0.2",
+        help="state mix as name=weight pairs",
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    env = dict(os.environ)
+    env.pop("FLUX_WRAPPERS_CACHE_TTL", None)
+    print(
+        f"{'scenario':<16} {'jobs':>8} {'wall s':>8} {'peak MB':>8} "
+        f"{'+MB':>7} {'rpcs':>7} {'MB decoded':>10}"
+    )
+    for name in args.scenario or list(SCENARIOS):
+        for count in args.jobs:
+            command = [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--child",
+                name,
+                "--jobs",
+                str(count),
+                "--nnodes",
+                str(args.nnodes),
+                "--states",
+                args.states,
+            ]
+            output = subprocess.run(
+                command, env=env, stdout=subprocess.PIPE, check=True, text=True
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{name:<16} {count:>8} {result['wall']:>8.3f} "
+                f"{result['rss_peak_kb'] / 1024:>8.1f} "
+                f"{(result['rss_peak_kb'] - result['rss_table_kb']) / 1024:>7.1f} "
+                f"{result['rpcs']:>7} {result['bytes_decoded'] / 1e6:>10.2f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
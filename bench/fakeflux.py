@@ -0,0 +1,831 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Stand-in flux bindings for benchmarking the wrappers without a live Flux
+instance.
+
+install() registers fake flux, flux.job, flux.hostlist and flux.uri modules in
+sys.modules. They implement the subset of the bindings used by the wrappers,
+backed by an in-memory synthetic job table built by make_jobs(). Responses
+are serialized to JSON when a request is made and decoded by the client as
+with a real broker, and every request and decoded byte is counted in STATS.
+"""
+
+import collections
+import errno
+import json
+import os
+import pwd
+import random
+import re
+import socket
+import sys
+import time
+import types
+import urllib.parse
+from functools import cached_property
+
+# Counters for the current process.
+STATS = {"rpcs": 0, "bytes_decoded": 0}
+
+# Synthetic job table served by the fake job-list service, see load().
+JOBS = []
+JOBS_BY_ID = {}
+
+# Job tables of child instances and seconds to wait before connecting to
+# them, keyed by the path of the instance URI.
+INSTANCES = {}
+DELAYS = {}
+
+FLUX_USERID_UNKNOWN = 0xFFFFFFFF
+
+STATES = {
+    "depend": 2,
+    "priority": 4,
+    "sched": 8,
+    "run": 16,
+    "cleanup": 32,
+    "inactive": 64,
+}
+STATE_MASKS = dict(STATES, pending=14, running=48, active=62)
+RESULTS = {"completed": 1, "failed": 2, "canceled": 4, "timeout": 8}
+STATE_NAMES = {bit: name.upper() for name, bit in STATES.items()}
+STATE_ABBREVS = {2: "D", 4: "P", 8: "S", 16: "R", 32: "C", 64: "I"}
+RESULT_NAMES = {bit: name.upper() for name, bit in RESULTS.items()}
+RESULT_ABBREVS = {1: "CD", 2: "F", 4: "CA", 8: "TO"}
+
+B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def make_jobs(count, nnodes=4, states=None, users=50, queues=("pbatch", "pdebug")):
+    """
+    Return count synthetic job-list job dictionaries.
+
+    states maps state names (e.g. "run", "sched", "inactive") to relative
+    weights. Running and inactive jobs get a contiguous nodelist of nnodes
+    hosts out of a pool of 10000 nodes.
+    """
+    if states is None:
+        states = {"sched": 0.3, "run": 0.5, "inactive": 0.2}
+    rng = random.Random(count)
+    names = list(states)
+    weights = [states[name] for name in names]
+    now = time.time()
+    uid = os.getuid()
+    jobs = []
+    for i in range(count):
+        state = STATES[rng.choices(names, weights)[0]]
+        t_submit = now - rng.uniform(60, 86400)
+        job = {
+            "id": (i + 1) << 24,
+            "userid": uid if i % users == 0 else 10000 + i % users,
+            "urgency": 16,
+            "priority": rng.randint(0, 1 << 20),
+            "state": state,
+            "name": f"job-{i % 997}",
+            "queue": queues[i % len(queues)],
+            "ntasks": nnodes * 4,
+            "nnodes": nnodes,
+            "duration": 3600.0,
+            "t_submit": t_submit,
+            "t_depend": t_submit,
+            "annotations": {},
+        }
+        if state < STATES["run"]:
+            job["annotations"] = {"sched": {"reason_pending": "insufficient resources"}}
+        else:
+            first = rng.randrange(0, 10000 - nnodes)
+            job["nodelist"] = f"node[{first}-{first + nnodes - 1}]"
+            job["ranks"] = f"{first}-{first + nnodes - 1}"
+            job["t_run"] = t_submit + rng.uniform(1, 60)
+        if state >= STATES["cleanup"]:
+            job["t_cleanup"] = job["t_run"] + rng.uniform(1, 3600)
+        if state == STATES["inactive"]:
+            job["t_inactive"] = job["t_cleanup"] + 1
+            job["result"] = rng.choice(list(RESULTS.values()))
+            job["success"] = job["result"] == RESULTS["completed"]
+            job["exception_occurred"] = job["result"] != RESULTS["completed"]
+            job["exception_severity"] = 0
+            job["exception_type"] = "cancel"
+        jobs.append(job)
+    return jobs
+
+
+def _list_order(job):
+    # job-list returns pending jobs by priority, then running jobs by start
+    # time and inactive jobs by completion time, most recent first.
+    if job["state"] < STATES["run"]:
+        return (0, -job.get("priority", 0), job["id"])
+    if job["state"] < STATES["inactive"]:
+        return (1, -job.get("t_run", 0.0), job["id"])
+    return (2, -job.get("t_inactive", 0.0), job["id"])
+
+
+def load(jobs, uri=None):
+    """
+    Serve jobs from the fake job-list service, of the child instance at uri
+    if given.
+    """
+    global JOBS, JOBS_BY_ID
+    table = sorted(jobs, key=_list_order)
+    if uri is not None:
+        INSTANCES[urllib.parse.urlparse(uri).path] = table
+        return
+    JOBS = table
+    JOBS_BY_ID = {job["id"]: job for job in jobs}
+
+
+_COMPARISONS = {
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+}
+
+
+def _match(job, constraint):
+    """
+    Evaluate the subset of RFC 31 constraints used by the wrappers.
+    """
+    for op, values in constraint.items():
+        if op == "and":
+            if not all(_match(job, value) for value in values):
+                return False
+        elif op == "or":
+            if not any(_match(job, value) for value in values):
+                return False
+        elif op == "not":
+            if any(_match(job, value) for value in values):
+                return False
+        elif op == "hostlist":
+            hosts = set()
+            for value in values:
+                hosts.update(Hostlist(value))
+            if hosts.isdisjoint(Hostlist(job.get("nodelist", ""))):
+                return False
+        elif op.startswith("t_"):
+            for value in values:
+                for prefix in ("<=", ">=", "<", ">", ""):
+                    if value.startswith(prefix):
+                        break
+                compare = _COMPARISONS.get(prefix, lambda a, b: a == b)
+                if not compare(job.get(op, 0.0), float(value[len(prefix) :])):
+                    return False
+        else:
+            raise OSError(71, f"unknown constraint operator {op}")
+    return True
+
+
+class Future:
+    """
+    A fulfilled request. The response is JSON encoded when the request is
+    made and decoded (and counted) by get().
+    """
+
+    def __init__(self, response=None, errnum=None):
+        STATS["rpcs"] += 1
+        self.errnum = errnum
+        self.payload = json.dumps(response) if response is not None else None
+
+    def get(self):
+        if self.errnum is not None:
+            raise OSError(self.errnum, os.strerror(self.errnum))
+        if self.payload is None:
+            return None
+        STATS["bytes_decoded"] += len(self.payload)
+        return json.loads(self.payload)
+
+    def get_str(self):
+        return self.payload
+
+    def wait_for(self, timeout=-1.0):
+        return self
+
+    def then(self, callback, *args):
+        _THEN_QUEUE.append((self, callback, args))
+        return self
+
+
+_THEN_QUEUE = collections.deque()
+
+
+class Flux:
+    """
+    Fake broker handle.
+    """
+
+    def __init__(self, uri=None):
+        self.uri = uri
+        self.jobs = JOBS
+        if uri is not None:
+            path = urllib.parse.urlparse(uri).path
+            time.sleep(DELAYS.get(path, 0.0))
+            if path not in INSTANCES:
+                raise OSError(errno.ECONNREFUSED, os.strerror(errno.ECONNREFUSED))
+            self.jobs = INSTANCES[path]
+
+    def attr_get(self, name):
+        # the caller owns the fake instance
+        if name == "security.owner":
+            return str(os.getuid())
+        raise OSError(errno.ENOENT, os.strerror(errno.ENOENT))
+
+    def rpc(self, topic, payload=None, *args, **kwargs):
+        return Future(RPC_HANDLERS.get(topic, lambda payload: {})(payload))
+
+    def reactor_run(self, *args):
+        while _THEN_QUEUE:
+            future, callback, cb_args = _THEN_QUEUE.popleft()
+            callback(future, *cb_args)
+        return 0
+
+
+# topic -> function(payload) returning a response, for Flux.rpc()
+RPC_HANDLERS = {}
+
+
+class JobID(int):
+    def __new__(cls, value):
+        if isinstance(value, str):
+            if value.startswith("f"):
+                number = 0
+                for char in value[1:]:
+                    number = number * 58 + B58.index(char)
+                value = number
+            else:
+                value = int(value, 0)
+        return super().__new__(cls, value)
+
+    @property
+    def f58(self):
+        number = int(self)
+        digits = ""
+        while True:
+            number, rem = divmod(number, 58)
+            digits = B58[rem] + digits
+            if number == 0:
+                return "f" + digits
+
+    def __str__(self):
+        return self.f58
+
+
+def statetostr(state, fmt="L"):
+    if fmt == "S":
+        return STATE_ABBREVS.get(state, "N")
+    return STATE_NAMES.get(state, "NEW")
+
+
+def resulttostr(result, fmt="L"):
+    if fmt == "S":
+        return RESULT_ABBREVS.get(result, "")
+    return RESULT_NAMES.get(result, "")
+
+
+class _Namespace:
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        return ""
+
+    def __str__(self):
+        return ""
+
+
+_USERNAMES = {}
+
+
+def _username(userid):
+    try:
+        return _USERNAMES[userid]
+    except KeyError:
+        try:
+            name = pwd.getpwuid(userid).pw_name
+        except KeyError:
+            name = str(userid)
+        _USERNAMES[userid] = name
+        return name
+
+
+class JobInfo:
+    """
+    JobInfo look-alike: every returned attribute is set on the object and
+    derived properties are computed on first use.
+    """
+
+    defaults = {
+        "t_depend": 0.0,
+        "t_run": 0.0,
+        "t_cleanup": 0.0,
+        "t_inactive": 0.0,
+        "duration": 0.0,
+        "name": "",
+        "queue": "",
+        "ntasks": "",
+        "nnodes": "",
+        "priority": "",
+        "ranks": "",
+        "nodelist": "",
+        "success": "",
+        "result": 0,
+        "exception_occurred": False,
+        "exception_severity": "",
+        "exception_type": "",
+        "annotations": {},
+    }
+
+    def __init__(self, info):
+        values = dict(self.defaults)
+        values.update(info)
+        values["id"] = JobID(values["id"])
+        values["state_id"] = values.pop("state", 0)
+        values["result_id"] = values.pop("result", 0)
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    @cached_property
+    def username(self):
+        return _username(self.userid)
+
+    @cached_property
+    def state(self):
+        return statetostr(self.state_id)
+
+    @cached_property
+    def state_single(self):
+        return statetostr(self.state_id, "S")
+
+    @cached_property
+    def result(self):
+        return resulttostr(self.result_id)
+
+    @cached_property
+    def status(self):
+        if self.state_id == STATES["inactive"]:
+            return self.result
+        return self.state
+
+    @cached_property
+    def status_abbrev(self):
+        if self.state_id == STATES["inactive"]:
+            return resulttostr(self.result_id, "S")
+        return self.state_single
+
+    @cached_property
+    def runtime(self):
+        if self.t_run == 0.0:
+            return 0.0
+        if self.t_cleanup > 0.0:
+            return self.t_cleanup - self.t_run
+        return time.time() - self.t_run
+
+    @cached_property
+    def contextual_time(self):
+        if self.state_single in "DPS":
+            return self.duration
+        return self.runtime
+
+    @cached_property
+    def sched(self):
+        return _Namespace(self.annotations.get("sched", {}))
+
+    @cached_property
+    def exception(self):
+        return _Namespace(
+            {
+                "occurred": self.exception_occurred,
+                "severity": self.exception_severity,
+                "type": self.exception_type,
+            }
+        )
+
+
+class JobListRPC(Future):
+    def get_jobs(self):
+        return self.get()["jobs"]
+
+    def get_jobinfos(self):
+        for job in self.get_jobs():
+            yield JobInfo(job)
+
+
+class JobListIdRPC(Future):
+    def get_job(self):
+        return self.get()["job"]
+
+    def get_jobinfo(self):
+        return JobInfo(self.get_job())
+
+
+def _userid(user):
+    if user is None:
+        return os.getuid()
+    if user == "all":
+        return FLUX_USERID_UNKNOWN
+    if str(user).isdigit():
+        return int(user)
+    return pwd.getpwnam(user).pw_uid
+
+
+def _project(job, attrs):
+    if "all" in attrs:
+        return job
+    return {key: job[key] for key in ["id"] + list(attrs) if key in job}
+
+
+def job_list(
+    flux_handle,
+    max_entries=1000,
+    attrs=["all"],
+    userid=None,
+    states=0,
+    results=0,
+    since=0.0,
+    name=None,
+    queue=None,
+    constraint=None,
+):
+    if userid is None:
+        userid = os.getuid()
+    jobs = []
+    for job in flux_handle.jobs:
+        if userid != FLUX_USERID_UNKNOWN and job["userid"] != userid:
+            continue
+        if states or results:
+            if not (
+                job["state"] & states
+                or (job["state"] == STATES["inactive"] and job.get("result", 0) & results)
+            ):
+                continue
+        if name and job["name"] != name:
+            continue
+        if queue and job["queue"] != queue:
+            continue
+        if since and job.get("t_inactive", since + 1) <= since:
+            continue
+        if constraint and not _match(job, constraint):
+            continue
+        jobs.append(_project(job, attrs))
+        if max_entries and len(jobs) >= max_entries:
+            break
+    return JobListRPC({"jobs": jobs})
+
+
+def job_list_id(flux_handle, jobid, attrs=["all"]):
+    job = JOBS_BY_ID.get(int(jobid))
+    if job is None:
+        return JobListIdRPC(errnum=2)
+    return JobListIdRPC({"job": _project(job, attrs)})
+
+
+class JobList:
+    def __init__(
+        self,
+        flux_handle,
+        attrs=["all"],
+        filters=None,
+        ids=None,
+        user=None,
+        max_entries=1000,
+        since=0.0,
+        name=None,
+        queue=None,
+        constraint=None,
+    ):
+        self.handle = flux_handle
+        self.attrs = list(attrs)
+        self.ids = list(map(JobID, ids)) if ids else []
+        self.userid = _userid(user)
+        self.max_entries = max_entries
+        self.since = since
+        self.name = name
+        self.queue = queue
+        self.constraint = constraint
+        self.states = 0
+        self.results = 0
+        for fname in filters or []:
+            for name in fname.split(","):
+                if name in RESULTS:
+                    self.results |= RESULTS[name]
+                elif name in STATE_MASKS:
+                    self.states |= STATE_MASKS[name]
+                else:
+                    raise ValueError(f"Invalid filter specified: {name}")
+
+    def fetch_jobs(self):
+        return job_list(
+            self.handle,
+            max_entries=self.max_entries,
+            attrs=self.attrs,
+            userid=self.userid,
+            states=self.states,
+            results=self.results,
+            since=self.since,
+            name=self.name,
+            queue=self.queue,
+            constraint=self.constraint,
+        )
+
+    def jobs(self):
+        if self.ids:
+            futures = [job_list_id(self.handle, jobid, self.attrs) for jobid in self.ids]
+            return [future.get_jobinfo() for future in futures]
+        return list(self.fetch_jobs().get_jobinfos())
+
+
+def _signal_job(jobid):
+    if int(jobid) in JOBS_BY_ID:
+        return Future({})
+    return Future(errnum=2)
+
+
+def _raiseall(payload):
+    userid = payload["userid"]
+    count = sum(
+        1
+        for job in JOBS
+        if job["state"] & payload["states"]
+        and (userid == FLUX_USERID_UNKNOWN or job["userid"] == userid)
+    )
+    return {"count": count, "errors": 0}
+
+
+RPC_HANDLERS["job-manager.raiseall"] = _raiseall
+RPC_HANDLERS["job-manager.killall"] = lambda payload: _raiseall(
+    dict(payload, states=STATES["run"])
+)
+
+
+def cancel_async(flux_handle, jobid, reason=None):
+    return _signal_job(jobid)
+
+
+def kill_async(flux_handle, jobid, signum=None):
+    return _signal_job(jobid)
+
+
+def cancel(flux_handle, jobid, reason=None):
+    cancel_async(flux_handle, jobid, reason).get()
+
+
+def kill(flux_handle, jobid, signum=None):
+    kill_async(flux_handle, jobid, signum).get()
+
+
+class JobURI:
+    """
+    Local and remote forms of an instance URI.
+    """
+
+    def __init__(self, uri):
+        parsed = urllib.parse.urlparse(uri)
+        if not parsed.scheme:
+            raise ValueError(f"JobURI '{uri}' does not have a valid scheme")
+        self.uri = uri
+        self.scheme = parsed.scheme
+        self.netloc = parsed.netloc
+        self.path = parsed.path
+
+    @property
+    def local(self):
+        return f"local://{self.path}"
+
+    @property
+    def remote(self):
+        if self.scheme == "ssh":
+            return self.uri
+        return f"ssh://{socket.gethostname()}{self.path}"
+
+    def __str__(self):
+        return self.uri
+
+
+class Hostlist:
+    """
+    Minimal hostlist: prefix[ranges] terms separated by commas.
+    """
+
+    term_re = re.compile(r"([^,\[]+)(?:\[([^\]]*)\])?")
+
+    def __init__(self, hosts=None):
+        self.hosts = []
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        for text in hosts or []:
+            for term in self.term_re.finditer(text):
+                prefix, ranges = term.groups()
+                if ranges is None:
+                    self.hosts.append(prefix)
+                    continue
+                for item in ranges.split(","):
+                    lo, _, hi = item.partition("-")
+                    width = len(lo)
+                    for i in range(int(lo), int(hi or lo) + 1):
+                        self.hosts.append(f"{prefix}{i:0{width}d}")
+
+    def __iter__(self):
+        return iter(self.hosts)
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def __getitem__(self, index):
+        return self.hosts[index]
+
+    def __contains__(self, host):
+        return host in self.hosts
+
+    def __str__(self):
+        return self.encode()
+
+    def encode(self):
+        # runs of hosts with the same prefix and consecutive numbers are
+        # written as prefix[lo-hi,...]
+        terms = []
+        for host in self.hosts:
+            match = re.fullmatch(r"(.*?)(\d+)", host)
+            if match is None:
+                terms.append([host, None, []])
+                continue
+            prefix, digits = match.groups()
+            number = int(digits)
+            # only zero padded numbers have a fixed width
+            digits = digits if digits.startswith("0") and len(digits) > 1 else ""
+            if terms and terms[-1][0] == prefix and terms[-1][1] == len(digits):
+                ranges = terms[-1][2]
+                if ranges[-1][1] == number - 1:
+                    ranges[-1][1] = number
+                else:
+                    ranges.append([number, number])
+            else:
+                terms.append([prefix, len(digits), [[number, number]]])
+        out = []
+        for prefix, width, ranges in terms:
+            if width is None:
+                out.append(prefix)
+            elif len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+                out.append(f"{prefix}{ranges[0][0]:0{width}d}")
+            else:
+                items = [
+                    f"{lo:0{width}d}" if lo == hi else f"{lo:0{width}d}-{hi:0{width}d}"
+                    for lo, hi in ranges
+                ]
+                out.append(f"{prefix}[{','.join(items)}]")
+        return ",".join(out)
+
+
+def _idset(ranks):
+    items = []
+    for rank in sorted(ranks):
+        if items and items[-1][1] == rank - 1:
+            items[-1][1] = rank
+        else:
+            items.append([rank, rank])
+    return ",".join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in items)
+
+
+def _R(cores_by_rank, nodelist=None, properties=None):
+    # R_lite entries for runs of ranks with the same cores
+    R_lite = []
+    for rank in sorted(cores_by_rank):
+        cores = cores_by_rank[rank]
+        if R_lite and R_lite[-1][1] == cores and R_lite[-1][0][-1] == rank - 1:
+            R_lite[-1][0].append(rank)
+        else:
+            R_lite.append(([rank], cores))
+    execution = {
+        "R_lite": [
+            {"rank": _idset(ranks), "children": {"core": cores}}
+            for ranks, cores in R_lite
+        ]
+    }
+    if nodelist is not None:
+        execution["nodelist"] = nodelist
+    if properties is not None:
+        execution["properties"] = properties
+    return {"version": 1, "execution": execution}
+
+
+DRAIN_REASONS = ["bad memory", "node health check failed", "kernel upgrade"]
+
+
+def make_resources(nnodes, cores=32, debug_fraction=0.125):
+    """
+    Return (config, sched.resource-status, resource.status) responses for a
+    synthetic cluster of nnodes nodes: the last debug_fraction of the nodes
+    make up the pdebug queue and the rest pbatch. About 60% of the nodes are
+    allocated, 10% partly allocated, 3% down and 3% drained.
+    """
+    rng = random.Random(nnodes)
+    ndebug = max(1, int(nnodes * debug_fraction))
+    all_cores = f"0-{cores - 1}"
+    allocated = {}
+    down = {}
+    drain = {}
+    for rank in range(nnodes):
+        roll = rng.random()
+        if roll < 0.6:
+            allocated[rank] = all_cores
+        elif roll < 0.7:
+            allocated[rank] = f"0-{cores // 2 - 1}"
+        elif roll < 0.73:
+            down[rank] = all_cores
+        elif roll < 0.76:
+            reason = rng.choice(DRAIN_REASONS)
+            drain.setdefault(reason, []).append(rank)
+            down[rank] = all_cores
+    config = {
+        "queues": {
+            "pbatch": {"requires": ["batch"], "policy": {"limits": {"duration": "1d"}}},
+            "pdebug": {"requires": ["debug"], "policy": {"limits": {"duration": "1h"}}},
+        },
+        "policy": {"jobspec": {"defaults": {"system": {"queue": "pbatch"}}}},
+    }
+    properties = {
+        "batch": _idset(range(nnodes - ndebug)),
+        "debug": _idset(range(nnodes - ndebug, nnodes)),
+    }
+    sched_status = {
+        "all": _R(
+            {rank: all_cores for rank in range(nnodes)},
+            [f"node[0-{nnodes - 1}]"],
+            properties,
+        ),
+        "allocated": _R(allocated),
+        "down": _R(down),
+    }
+    now = time.time()
+    status = {
+        "drain": {
+            _idset(ranks): {"timestamp": now - 3600 * i, "reason": reason}
+            for i, (reason, ranks) in enumerate(drain.items())
+        }
+    }
+    return config, sched_status, status
+
+
+def load_resources(config, sched_status, status):
+    """
+    Serve the responses of make_resources() from the fake services.
+    """
+    RPC_HANDLERS["config.get"] = lambda payload: config
+    RPC_HANDLERS["sched.resource-status"] = lambda payload: sched_status
+    RPC_HANDLERS["resource.status"] = lambda payload: status
+    RPC_HANDLERS["job-manager.queue-status"] = lambda payload: {
+        "enable": True,
+        "start": True,
+    }
+
+
+def install():
+    """
+    Register the fake flux modules in sys.modules.
+    """
+    flux = types.ModuleType("flux")
+    flux.Flux = Flux
+    flux.Future = Future
+
+    job = types.ModuleType("flux.job")
+    for name in [
+        "JobID",
+        "JobInfo",
+        "JobList",
+        "job_list",
+        "job_list_id",
+        "cancel",
+        "cancel_async",
+        "kill",
+        "kill_async",
+    ]:
+        setattr(job, name, globals()[name])
+    job.id_parse = JobID
+
+    info = types.ModuleType("flux.job.info")
+    info.statetostr = statetostr
+    info.resulttostr = resulttostr
+    job.info = info
+
+    hostlist = types.ModuleType("flux.hostlist")
+    hostlist.Hostlist = Hostlist
+
+    uri = types.ModuleType("flux.uri")
+    uri.JobURI = JobURI
+
+    flux.job = job
+    flux.hostlist = hostlist
+    flux.uri = uri
+    sys.modules.update(
+        {
+            "flux": flux,
+            "flux.job": job,
+            "flux.job.info": info,
+            "flux.hostlist": hostlist,
+            "flux.uri": uri,
+        }
+    )
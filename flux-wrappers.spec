@@ -38,7 +38,9 @@ install src/slurm2flux.pl $RPM_BUILD_ROOT%{_bindir}/slurm2flux
 install src/fsqueue.py $RPM_BUILD_ROOT%{_bindir}/squeue
 install src/fshowq.py $RPM_BUILD_ROOT%{_bindir}/showq
 install src/fscancel.py $RPM_BUILD_ROOT%{_bindir}/scancel
-install src/fsinfo.pl $RPM_BUILD_ROOT%{_bindir}/sinfo
+install src/fsinfo.py $RPM_BUILD_ROOT%{_bindir}/sinfo
+mkdir -p $RPM_BUILD_ROOT%{python3_sitelib}/fluxwrappers
+install -m 644 src/fluxwrappers/*.py $RPM_BUILD_ROOT%{python3_sitelib}/fluxwrappers
 ln $RPM_BUILD_ROOT%{_bindir}/slurm2flux $RPM_BUILD_ROOT%{_bindir}/srun
 ln $RPM_BUILD_ROOT%{_bindir}/slurm2flux $RPM_BUILD_ROOT%{_bindir}/sbatch
 ln $RPM_BUILD_ROOT%{_bindir}/slurm2flux $RPM_BUILD_ROOT%{_bindir}/salloc
@@ -61,6 +63,7 @@ rm -rf $RPM_BUILD_ROOT
 %{_bindir}/srun
 %{_bindir}/sbatch
 %{_bindir}/salloc
+%{python3_sitelib}/fluxwrappers
 
 #%{_mandir}/man1/*
 	
@@ -0,0 +1,27 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Code shared by the Python flux-wrappers scripts.
+
+Submodules are not imported here so that each script only loads what it
+uses, which keeps startup time down:
+
+  cache       on-node snapshot cache of job-list responses
+  connection  connect() to a flux instance
+  format      SlurmFormatter and SinfoFormatter for Slurm style -o format strings
+  help        CustomHelpFormatter for argparse
+  jobids      -j job id arguments and windowed lookups by id
+  instances   concurrent job listings of nested flux instances
+  output      JSON, newline delimited JSON and CSV job output
+  record      compact JobRecord built from job-list responses
+  resources   node, drain and queue state for sinfo
+  server      resident per-user server running the wrappers with warm imports
+  states      Slurm to Flux job state mappings
+  table       columnar JobTable for sorting and summarizing jobs
+  timing      per-phase timing and profiling of an invocation
+"""
@@ -0,0 +1,104 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Snapshot cache of job-list responses shared by a user's wrapper invocations.
+
+The cache is enabled by setting FLUX_WRAPPERS_CACHE_TTL to a number of
+seconds. Each distinct query (instance URI, filters and attributes) is
+stored as a compact JSON file under a per-user directory, and reused by
+later invocations until it is older than the TTL.
+
+Snapshots are not shared between users: they are written by the invocations
+themselves, so a shared directory would let any user plant another user's
+job list. Each user still sends one query per TTL, and the cache only saves
+the repeated queries of the same user.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+def default_path():
+    """
+    return the per-user cache directory
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"flux-wrappers-{os.getuid()}")
+
+
+class JobCache:
+    """
+    Per-user snapshot cache of job-list responses on this node.
+    """
+
+    def __init__(self, ttl, path=None):
+        self.ttl = ttl
+        self.path = path or default_path()
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Return a JobCache configured from FLUX_WRAPPERS_CACHE_TTL, or None if
+        the cache is disabled.
+        """
+        try:
+            ttl = float(os.environ.get("FLUX_WRAPPERS_CACHE_TTL", 0))
+        except ValueError:
+            return None
+        if ttl <= 0:
+            return None
+        return cls(ttl)
+
+    def _filename(self, query):
+        key = json.dumps(
+            [os.environ.get("FLUX_URI", ""), query], sort_keys=True, default=str
+        )
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.path, f"{digest}.json")
+
+    def get(self, query):
+        """
+        Return the list of job dictionaries stored for query, or None if there
+        is no snapshot younger than the TTL.
+        """
+        try:
+            with open(self._filename(query), "rb") as fp:
+                st = os.fstat(fp.fileno())
+                if st.st_uid != os.getuid() or time.time() - st.st_mtime > self.ttl:
+                    return None
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, query, jobs):
+        """
+        Store the list of job dictionaries returned for query. Errors are
+        ignored, the cache is only an optimization.
+        """
+        tmp = None
+        try:
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            st = os.stat(self.path)
+            if st.st_uid != os.getuid() or st.st_mode & 0o077:
+                return
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w") as fp:
+                json.dump(jobs, fp, separators=(",", ":"))
+            os.replace(tmp, self._filename(query))
+            tmp = None
+        except OSError:
+            pass
+        finally:
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
@@ -0,0 +1,61 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Connection setup for the wrappers, and what the caller may see and do on a
+connection.
+
+The flux bindings are only imported when a connection is opened, so that
+options like --help and -V do not pay for loading them.
+"""
+
+import os
+import pwd
+
+# A handle to the enclosing instance opened ahead of time by the resident
+# server, see server.py. It is handed out once.
+_handle = None
+
+
+def connect(uri=None):
+    """
+    Return a handle to the flux instance at uri, or to the enclosing
+    instance if uri is None.
+    """
+    global _handle
+    import flux
+
+    if uri is None:
+        if _handle is not None:
+            handle, _handle = _handle, None
+            return handle
+        return flux.Flux()
+    return flux.Flux(uri)
+
+
+def is_owner(handle):
+    """
+    Return True if the caller is the owner of the instance at handle. Only
+    the owner is sent other users' jobs by the job-manager journal and may
+    cancel them.
+    """
+    try:
+        return int(handle.attr_get("security.owner")) == os.getuid()
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def is_caller(user):
+    """
+    Return True if user, a user name or uid, is the caller. "all" is not.
+    """
+    if user.isdigit():
+        return int(user) == os.getuid()
+    try:
+        return pwd.getpwnam(user).pw_uid == os.getuid()
+    except KeyError:
+        return False
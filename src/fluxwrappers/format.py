@@ -0,0 +1,342 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Slurm style format strings, e.g. squeue -o.
+"""
+
+import functools
+import re
+import time
+
+# Tokens whose values repeat across jobs. Their formatted cells are cached
+# by value so that identical values are only padded and truncated once.
+CACHED_TOKENS = {"%a", "%u", "%P", "%j", "%t", "%M", "%D", "%R"}
+
+# Upper bound on the number of cached cells per format token.
+CELL_CACHE_SIZE = 4096
+
+PENDING_STATES = {"DEPEND", "PRIORITY", "SCHED"}
+
+
+class SlurmFormatter:
+    """ """
+
+    token_re = r"%\.?[0-9]*[^%\s]?"
+    token_pad_re = r"\.*[0-9]+"
+
+    # job-list attributes needed to render each token. The job id is always
+    # returned by job-list so it does not need to be requested.
+    token_attrs = {
+        "%": [],
+        "%a": ["userid"],
+        "%i": [],
+        "%P": ["queue"],
+        "%j": ["name"],
+        "%u": ["userid"],
+        "%t": ["state", "result"],
+        "%M": ["t_run", "t_cleanup"],
+        "%D": ["nnodes"],
+        "%R": ["annotations", "nodelist"],
+    }
+
+    def __init__(self):
+        # compiled plans keyed by format string, see compile()
+        self._plans = {}
+
+        # per-token getters and cell caches keyed by the ops of a plan, see
+        # render_job()
+        self._cells = {}
+
+        # Run times are computed relative to this time, so all rows of a
+        # listing agree. It is refreshed for each listing by set_time().
+        self.now = time.time()
+
+        # Per-token functions returning the value of a field for a job. Only
+        # the getters referenced by a compiled plan are called, so fields
+        # missing from the format are never computed.
+        self.job_getters = {
+            "%": lambda job: "",
+            "%a": lambda job: job.username,
+            "%i": lambda job: job.f58,
+            "%P": lambda job: job.queue,
+            "%j": lambda job: job.name,
+            "%u": lambda job: job.username,
+            "%t": lambda job: job.status_abbrev,
+            "%M": lambda job: self.parse_time(self.get_runtime(job)),
+            "%D": lambda job: job.nnodes,
+            "%R": self.get_reason_node,
+        }
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def parse_time(time):
+        """
+        turn a bunch of seconds into something human readable
+        """
+        time = int(time)
+
+        # Convert time into hours, minutes, and seconds.
+        days = time // 86400
+        hours = time // 3600 % 24
+        minutes = time // 60 % 60
+        seconds = time % 60
+
+        if days > 0:
+            return f"{days}-{hours:02}:{minutes:02}:{seconds:02}"
+
+        if hours > 0:
+            return f"{hours}:{minutes:02}:{seconds:02}"
+
+        return f"{minutes:02}:{seconds:02}"
+
+    def get_header_dict(self):
+        """
+        print header for output
+        """
+        headers = {
+            "%": "",
+            "%a": "USERNAME",
+            "%i": "JOBID",
+            "%P": "PARTITION",
+            "%j": "NAME",
+            "%u": "USER",
+            "%t": "STATUS",
+            "%M": "TIME",
+            "%D": "NODES",
+            "%R": "NODELIST(REASON)",
+        }
+
+        return headers
+
+    def set_time(self, now=None):
+        """
+        set the time run times are computed at, by default the current time
+        """
+        self.now = time.time() if now is None else now
+
+    def get_runtime(self, job):
+        """
+        return the run time of a job in whole seconds as of self.now
+        """
+        if job.t_run == 0.0:
+            return 0
+        return int((job.t_cleanup or self.now) - job.t_run)
+
+    @staticmethod
+    def get_reason_node(job):
+        """
+        return the pending reason of a job, or its nodelist if it has none
+        """
+        return job.reason or job.nodelist
+
+    def get_job_dict(self, job, keys=None):
+        """
+        Return a dictionary of the fields of a job for the tokens in keys,
+        or for every supported token if keys is None.
+        """
+        if keys is None:
+            keys = self.job_getters.keys()
+        return {key: self.job_getters[key](job) for key in keys}
+
+    def compile(self, format_string):
+        """
+        Parse format_string once into a plan that render() can apply to any
+        number of rows.
+
+        The plan is a tuple of (ops, tail, unknown_tokens) where each op is a
+        (prefix, key, spec, width) tuple: the literal text preceding a token,
+        the token's lookup key, and an optional alignment spec and width.
+        """
+        plan = self._plans.get(format_string)
+        if plan is not None:
+            return plan
+
+        known = self.get_header_dict()
+        ops = []
+        unknown_tokens = []
+        prev_end = 0
+
+        # Search for tokens that begin with % in the format string.
+        for token in re.finditer(self.token_re, format_string):
+            key = token.group()
+            spec = None
+            width = None
+
+            # Users may specify padding modifiers before tokens in the form
+            # of %.10u or %10u to indicate a prefix or suffix padding
+            # respectively. Find and extract padding modifiers if present.
+            width_match = re.match(self.token_pad_re, key[1:])
+            if width_match is not None:
+                width_string = width_match.group()
+                key = key.replace(width_string, "")
+                if width_string[0] == ".":
+                    width = int(width_string[1:])
+                    spec = f">{width}"
+                else:
+                    width = int(width_string)
+                    spec = f"<{width}"
+
+            # To match the behavior of squeue's format option we should
+            # ignore unknown tokens and print them as regular text, so they
+            # are left in the prefix of the next known token.
+            if key not in known:
+                unknown_tokens.append(key)
+                continue
+
+            ops.append((format_string[prev_end : token.start()], key, spec, width))
+            prev_end = token.end()
+
+        # Keep the remainder of format string after the last token.
+        plan = (tuple(ops), format_string[prev_end:], unknown_tokens)
+        self._plans[format_string] = plan
+        return plan
+
+    def render(self, plan, types_dict):
+        """
+        format one row of output from a plan returned by compile()
+        """
+        ops, tail, _ = plan
+        result = []
+        for prefix, key, spec, width in ops:
+            output = types_dict[key]
+            if spec is None:
+                output = str(output)
+            else:
+                output = format(output, spec)[:width]
+            result.append(prefix)
+            result.append(output)
+        result.append(tail)
+        return "".join(result)
+
+    def render_job(self, plan, job):
+        """
+        format one job from a plan returned by compile(), computing only the
+        fields the plan references
+        """
+        ops, tail, _ = plan
+        cells = self._cells.get(ops)
+        if cells is None:
+            cells = self._cells[ops] = tuple(
+                (
+                    prefix,
+                    self.job_getters[key],
+                    {} if key in CACHED_TOKENS else None,
+                    spec,
+                    width,
+                )
+                for prefix, key, spec, width in ops
+            )
+        result = []
+        for prefix, getter, cache, spec, width in cells:
+            value = getter(job)
+            output = None if cache is None else cache.get(value)
+            if output is None:
+                if spec is None:
+                    output = str(value)
+                else:
+                    output = format(value, spec)[:width]
+                if cache is not None and len(cache) < CELL_CACHE_SIZE:
+                    cache[value] = output
+            result.append(prefix)
+            result.append(output)
+        result.append(tail)
+        return "".join(result)
+
+    def format(self, format_string, types_dict):
+        """
+        format output to minimc slurm's format language
+        """
+        return self.render(self.compile(format_string), types_dict)
+
+    def get_attrs(self, format_string, states=None):
+        """
+        Return the list of job-list attributes needed to render format_string.
+
+        If states, the set of job states that will be listed, is given, %R
+        only requests the pending reason if pending jobs are listed and the
+        nodelist if jobs that have run are listed.
+        """
+        attrs = []
+        for _, key, _, _ in self.compile(format_string)[0]:
+            token_attrs = self.token_attrs[key]
+            if key == "%R" and states is not None:
+                token_attrs = []
+                if states & PENDING_STATES:
+                    token_attrs.append("annotations")
+                if states - PENDING_STATES:
+                    token_attrs.append("nodelist")
+            for attr in token_attrs:
+                if attr not in attrs:
+                    attrs.append(attr)
+        return attrs
+
+    def get_unknown_tokens(self, format_string):
+        """
+        Return a list of unknown tokens based on the types_dict given.
+        """
+        return list(self.compile(format_string)[2])
+
+
+class SinfoFormatter(SlurmFormatter):
+    """
+    sinfo -o format strings, rendered from node groups (see fsinfo.py)
+    with the same compiled plans and cell caches as SlurmFormatter.
+    """
+
+    def __init__(self):
+        super().__init__()
+        from fluxwrappers.resources import STATE_NAMES
+
+        self.job_getters = {
+            "%": lambda row: "",
+            "%P": lambda row: row.partition + ("*" if row.default else ""),
+            "%R": lambda row: row.partition,
+            "%a": lambda row: row.avail,
+            "%l": lambda row: self.format_limit(row.timelimit),
+            "%D": lambda row: row.nnodes,
+            "%t": lambda row: row.state,
+            "%T": lambda row: STATE_NAMES[row.state],
+            "%N": lambda row: row.nodelist,
+            "%E": lambda row: row.reason or "none",
+            # resource.status does not record who drained a node
+            "%u": lambda row: "Unknown",
+            "%H": lambda row: self.format_timestamp(row.timestamp),
+        }
+
+    def get_header_dict(self):
+        return {
+            "%": "",
+            "%P": "PARTITION",
+            "%R": "PARTITION",
+            "%a": "AVAIL",
+            "%l": "TIMELIMIT",
+            "%D": "NODES",
+            "%t": "STATE",
+            "%T": "STATE",
+            "%N": "NODELIST",
+            "%E": "REASON",
+            "%u": "USER",
+            "%H": "TIMESTAMP",
+        }
+
+    def format_limit(self, seconds):
+        """
+        return a time limit in Slurm's format, "infinite" if there is none
+        """
+        if seconds is None or seconds == float("inf"):
+            return "infinite"
+        return self.parse_time(seconds)
+
+    @staticmethod
+    def format_timestamp(timestamp):
+        """
+        return a drain time in Slurm's format, "Unknown" if there is none
+        """
+        if not timestamp:
+            return "Unknown"
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
@@ -0,0 +1,31 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+argparse help formatting shared by the wrappers.
+"""
+
+import argparse
+
+
+class CustomHelpFormatter(argparse.HelpFormatter):
+    """
+    Create minimal argparse format to mimic that of Slurm.
+
+    See https://stackoverflow.com/a/31124505 for original answer to shortening
+    argparse's usage documentation.
+    """
+
+    def __init__(self, prog):
+        super().__init__(prog, max_help_position=40, width=80)
+
+    def _format_action_invocation(self, action):
+        if not action.option_strings or action.nargs == 0:
+            return super()._format_action_invocation(action)
+        default = self._get_default_metavar_for_optional(action)
+        args_string = self._format_args(action, default)
+        return ", ".join(action.option_strings) + " " + args_string
@@ -0,0 +1,151 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Job listings across nested Flux instances.
+
+A running job that is itself a Flux instance (e.g. flux batch or flux alloc)
+publishes its URI in the user.uri annotation. list_instances() lists the jobs
+of those instances, and of the instances running in them, with the same query
+as the enclosing instance.
+
+Each instance is queried on its own handle in a daemon thread, with at most
+max_connections handles open at once. An instance that cannot be reached or
+does not answer within the timeout is reported as an error and left behind,
+so it only delays the listing by the timeout and the other instances' jobs
+are still listed. Its thread keeps its connection until it ends, so it still
+counts toward max_connections; instances that get no connection within a
+further timeout because of such threads are reported as errors too.
+"""
+
+import collections
+import errno
+import os
+import queue
+import socket
+import threading
+import time
+
+from fluxwrappers.record import records
+
+RUN = 16
+
+
+def child_uri(uri, hostname=None):
+    """
+    Return the URI to connect to the instance published as uri: the local
+    URI if the instance runs on this host, otherwise the remote one.
+    """
+    from flux.uri import JobURI
+
+    uri = JobURI(uri)
+    if hostname is None:
+        hostname = socket.gethostname()
+    if uri.netloc.split(".")[0] == hostname.split(".")[0]:
+        return uri.local
+    return uri.remote
+
+
+def fetch_instance(uri, query, timeout):
+    """
+    return the job dictionaries of the instance at uri matching query, a
+    dict of JobList arguments
+    """
+    import flux.job
+
+    from fluxwrappers.connection import connect
+
+    handle = connect(child_uri(uri))
+    rpc = flux.job.JobList(handle, **query).fetch_jobs()
+    rpc.wait_for(timeout)
+    return rpc.get_jobs()
+
+
+def _children(path, jobs):
+    # Only running instances of the caller can be connected to.
+    uid = os.getuid()
+    for job in jobs:
+        if job.uri and job.state_id == RUN and job.userid == uid:
+            yield f"{path}/{job.f58}" if path else job.f58, job.uri
+
+
+def _fetch(results, path, uri, query, timeout):
+    try:
+        results.put((path, fetch_instance(uri, query, timeout), None))
+    except Exception as err:  # reported for this instance by list_instances()
+        results.put((path, None, err))
+
+
+def list_instances(jobs, query, max_connections=8, timeout=10.0):
+    """
+    Yield (instance, jobs, error) for each Flux instance running as one of
+    jobs, a list of JobRecords, and for the instances running in those, in
+    the order the listings complete.
+
+    instance is the path of job ids leading to the instance, e.g. "fA1/fB2",
+    jobs is the list of its JobRecords matching query, a dict of JobList
+    arguments, with their instance field set, and error is None or the
+    exception that prevented the listing, in which case jobs is empty.
+    """
+    results = queue.Queue()
+    pending = collections.deque(_children("", jobs))
+    deadlines = {}
+    # listings that timed out but whose threads still hold a connection
+    abandoned = set()
+    # time by which a connection must be released, if all are abandoned
+    stalled = None
+    while pending or deadlines:
+        while pending and len(deadlines) + len(abandoned) < max_connections:
+            path, uri = pending.popleft()
+            threading.Thread(
+                target=_fetch,
+                args=(results, path, uri, query, timeout),
+                daemon=True,
+            ).start()
+            deadlines[path] = time.monotonic() + timeout
+
+        if deadlines:
+            wait = min(deadlines.values()) - time.monotonic()
+        else:
+            if stalled is None:
+                stalled = time.monotonic() + timeout
+            wait = stalled - time.monotonic()
+            if wait <= 0:
+                while pending:
+                    path, uri = pending.popleft()
+                    yield path, [], TimeoutError(
+                        errno.ETIMEDOUT, f"no connection within {timeout:g}s"
+                    )
+                break
+        try:
+            path, job_dicts, error = results.get(timeout=max(wait, 0.0))
+        except queue.Empty:
+            now = time.monotonic()
+            for path, deadline in list(deadlines.items()):
+                if deadline <= now:
+                    del deadlines[path]
+                    abandoned.add(path)
+                    yield path, [], TimeoutError(
+                        errno.ETIMEDOUT, f"no response within {timeout:g}s"
+                    )
+            continue
+        stalled = None
+
+        # A listing that completes after its deadline was already reported,
+        # its connection is now free.
+        if path in abandoned:
+            abandoned.discard(path)
+            continue
+        del deadlines[path]
+        if error is not None:
+            yield path, [], error
+            continue
+        instance_jobs = list(records(job_dicts))
+        for job in instance_jobs:
+            job.instance = path
+        pending.extend(_children(path, instance_jobs))
+        yield path, instance_jobs, None
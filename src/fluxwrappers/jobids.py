@@ -0,0 +1,83 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Job id arguments and lookups of many jobs by id.
+
+-j takes a comma separated list of job ids in which "@file" stands for the
+ids in file and "-" for the ids on stdin, separated by commas or white space.
+The ids are read as they are looked up, so long lists from other tools start
+producing output before they have been read to the end.
+
+lookup_jobs() keeps up to window job-list requests in flight on one handle
+and returns the jobs in the order they were given, so looking up thousands
+of jobs does not take thousands of round trips one after another.
+"""
+
+import collections
+import sys
+
+# Upper bound on the number of job-list requests in flight at once.
+LOOKUP_WINDOW = 256
+
+
+def _split(lines):
+    for line in lines:
+        yield from line.replace(",", " ").split()
+
+
+def read_ids(spec, stdin=None):
+    """
+    yield the job id strings of a -j argument, reading files and stdin as
+    the ids are consumed
+    """
+    for item in spec.split(","):
+        item = item.strip()
+        if item == "-":
+            yield from _split(stdin or sys.stdin)
+        elif item.startswith("@"):
+            with open(item[1:]) as fp:
+                yield from _split(fp)
+        elif item:
+            yield item
+
+
+def _result(text, future, error):
+    if future is not None:
+        try:
+            return text, future.get_job(), None
+        except OSError as err:
+            error = err
+    return text, None, error
+
+
+def lookup_jobs(handle, ids, attrs, window=LOOKUP_WINDOW):
+    """
+    Yield (jobid, job, error) for each distinct job id in ids, an iterable
+    of job id strings, in the order given.
+
+    job is the job-list dictionary of the job with attrs, or None if the id
+    is invalid or the lookup failed, in which case error is the exception.
+    """
+    import flux.job
+
+    seen = set()
+    inflight = collections.deque()
+    for text in ids:
+        try:
+            jobid = flux.job.JobID(text)
+        except (OSError, ValueError) as err:
+            inflight.append((text, None, err))
+        else:
+            if jobid in seen:
+                continue
+            seen.add(jobid)
+            inflight.append((text, flux.job.job_list_id(handle, jobid, attrs), None))
+        if len(inflight) >= window:
+            yield _result(*inflight.popleft())
+    while inflight:
+        yield _result(*inflight.popleft())
@@ -0,0 +1,170 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Job output for scripts: JSON, newline delimited JSON and CSV.
+
+Values are written as they come from job-list, without padding or time
+formatting: ids and counts are numbers, timestamps are seconds since the
+epoch and run times are seconds. Jobs are serialized one at a time as they
+are written, so output starts before the whole list has been read.
+"""
+
+import sys
+
+# output field -> (job-list attributes, function returning the field of a
+# JobRecord). Empty values are written as null in JSON and empty in CSV.
+FIELDS = {
+    "job_id": ([], lambda job: job.id),
+    "job_id_f58": ([], lambda job: job.f58),
+    "name": (["name"], lambda job: job.name),
+    "user_name": (["userid"], lambda job: job.username),
+    "user_id": (["userid"], lambda job: job.userid),
+    "partition": (["queue"], lambda job: job.queue or None),
+    "job_state": (["state"], lambda job: job.state),
+    "result": (["state", "result"], lambda job: job.result or None),
+    "node_count": (["nnodes"], lambda job: _value(job.nnodes)),
+    "tasks": (["ntasks"], lambda job: _value(job.ntasks)),
+    "priority": (["priority"], lambda job: _value(job.priority)),
+    "submit_time": (["t_submit"], lambda job: job.t_submit or None),
+    "start_time": (["t_run"], lambda job: job.t_run or None),
+    "end_time": (["t_cleanup"], lambda job: job.t_cleanup or None),
+    "time_limit": (["duration"], lambda job: job.duration or None),
+    "run_time": (["t_run", "t_cleanup"], lambda job: job.runtime),
+    "nodes": (["nodelist"], lambda job: job.nodelist or None),
+    "state_reason": (["annotations"], lambda job: job.reason or None),
+    "instance": ([], lambda job: job.instance or None),
+}
+
+# Fields that are only written by default where they apply, e.g. the
+# instance of jobs listed with fsqueue --recursive.
+OPTIONAL_FIELDS = ["instance"]
+
+MODES = ["json", "ndjson", "csv"]
+
+
+def _value(value):
+    return None if value == "" else value
+
+
+def parse_fields(spec):
+    """
+    Return the list of fields in the comma separated spec, or all fields
+    other than OPTIONAL_FIELDS if spec is None. Raises ValueError for an
+    unknown field.
+    """
+    if spec is None:
+        return [field for field in FIELDS if field not in OPTIONAL_FIELDS]
+    fields = [field.strip() for field in spec.split(",") if field.strip()]
+    for field in fields:
+        if field not in FIELDS:
+            raise ValueError(field)
+    return fields
+
+
+def get_attrs(fields):
+    """
+    return the job-list attributes needed to write fields
+    """
+    attrs = []
+    for field in fields:
+        for attr in FIELDS[field][0]:
+            if attr not in attrs:
+                attrs.append(attr)
+    return attrs
+
+
+def _rows(jobs, fields):
+    getters = [FIELDS[field][1] for field in fields]
+    for job in jobs:
+        yield [getter(job) for getter in getters]
+
+
+def json_lines(jobs, fields):
+    """
+    yield the lines of a squeue --json style {"jobs": [...]} document
+    """
+    import json
+
+    encode = json.JSONEncoder().encode
+    yield '{"jobs": ['
+    previous = None
+    for row in _rows(jobs, fields):
+        if previous is not None:
+            yield previous + ","
+        previous = encode(dict(zip(fields, row)))
+    if previous is not None:
+        yield previous
+    yield "]}"
+
+
+def ndjson_lines(jobs, fields):
+    """
+    yield one JSON object per job
+    """
+    import json
+
+    encode = json.JSONEncoder().encode
+    for row in _rows(jobs, fields):
+        yield encode(dict(zip(fields, row)))
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(jobs, fields, header=True):
+    """
+    yield a CSV header line, unless header is False, and one line per job
+    """
+    import csv
+
+    writer = csv.writer(_Echo(), lineterminator="")
+    if header:
+        yield writer.writerow(fields)
+    for row in _rows(jobs, fields):
+        yield writer.writerow(row)
+
+
+def job_lines(mode, jobs, fields, header=True):
+    """
+    yield the output lines for jobs in mode, one of MODES
+    """
+    if mode == "json":
+        return json_lines(jobs, fields)
+    if mode == "ndjson":
+        return ndjson_lines(jobs, fields)
+    return csv_lines(jobs, fields, header)
+
+
+def write_lines(lines, out=None, chunk_size=65536):
+    """
+    write lines to out, one write per chunk of lines
+
+    The first chunks are small so the header and first rows show up
+    quickly, then chunks grow up to chunk_size bytes.
+    """
+    if out is None:
+        out = sys.stdout
+    limit = 256
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= limit:
+            chunk.append("")
+            out.write("\n".join(chunk))
+            out.flush()
+            chunk = []
+            size = 0
+            limit = min(limit * 4, chunk_size)
+    if chunk:
+        chunk.append("")
+        out.write("\n".join(chunk))
+        out.flush()
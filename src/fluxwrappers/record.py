@@ -0,0 +1,198 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Compact job records built from job-list responses.
+
+flux.job.JobInfo keeps every attribute, with defaults for the ones that were
+not requested, in a per-object dictionary. The wrappers only use a handful
+of fields, so they convert each job dictionary to a JobRecord with __slots__
+and drop the dictionary, which keeps large job lists small in memory.
+"""
+
+import collections
+import pwd
+import time
+
+ExceptionInfo = collections.namedtuple("ExceptionInfo", "occurred severity type")
+
+# The state and result names are looked up once per distinct value.
+_STATES = {}
+_RESULTS = {}
+_USERNAMES = {}
+
+INACTIVE = 64
+
+
+def statetostr(state_id, fmt="L"):
+    """
+    return the name of a job state, cached
+    """
+    try:
+        return _STATES[state_id, fmt]
+    except KeyError:
+        from flux.job.info import statetostr as flux_statetostr
+
+        name = _STATES[state_id, fmt] = flux_statetostr(state_id, fmt)
+        return name
+
+
+def resulttostr(result_id, fmt="L"):
+    """
+    return the name of a job result, cached
+    """
+    try:
+        return _RESULTS[result_id, fmt]
+    except KeyError:
+        from flux.job.info import resulttostr as flux_resulttostr
+
+        name = _RESULTS[result_id, fmt] = flux_resulttostr(result_id, fmt)
+        return name
+
+
+def username(userid):
+    """
+    return the user name for userid, or userid as a string if it is unknown
+    """
+    try:
+        return _USERNAMES[userid]
+    except KeyError:
+        try:
+            name = pwd.getpwuid(userid).pw_name
+        except (KeyError, TypeError):
+            name = str(userid)
+        _USERNAMES[userid] = name
+        return name
+
+
+class JobRecord:
+    """
+    The fields of a job used by the wrappers.
+
+    The derived properties have the same names and values as the JobInfo
+    properties they replace.
+    """
+
+    __slots__ = (
+        "id",
+        "userid",
+        "state_id",
+        "result_id",
+        "queue",
+        "name",
+        "nnodes",
+        "ntasks",
+        "priority",
+        "t_submit",
+        "t_run",
+        "t_cleanup",
+        "t_inactive",
+        "duration",
+        "nodelist",
+        "reason",
+        "exception_occurred",
+        "exception_severity",
+        "exception_type",
+        "uri",
+        "instance",
+        "_f58",
+    )
+
+    def __init__(self, job):
+        get = job.get
+        self.id = job["id"]
+        self.userid = get("userid")
+        self.state_id = get("state", 0)
+        self.result_id = get("result", 0)
+        self.queue = get("queue", "")
+        self.name = get("name", "")
+        self.nnodes = get("nnodes", "")
+        self.ntasks = get("ntasks", "")
+        self.priority = get("priority", "")
+        self.t_submit = get("t_submit", 0.0)
+        self.t_run = get("t_run", 0.0)
+        self.t_cleanup = get("t_cleanup", 0.0)
+        self.t_inactive = get("t_inactive", 0.0)
+        self.duration = get("duration", 0.0)
+        self.nodelist = get("nodelist", "")
+        annotations = get("annotations", {})
+        sched = annotations.get("sched") or {}
+        self.reason = sched.get("reason_pending", "")
+        self.exception_occurred = get("exception_occurred", False)
+        self.exception_severity = get("exception_severity", "")
+        self.exception_type = get("exception_type", "")
+        # URI of the Flux instance running as this job, if it is one
+        self.uri = (annotations.get("user") or {}).get("uri", "")
+        # path of the instance the job was listed from, see instances.py
+        self.instance = ""
+        self._f58 = None
+
+    @property
+    def f58(self):
+        if self._f58 is None:
+            from flux.job import JobID
+
+            self._f58 = JobID(self.id).f58
+        return self._f58
+
+    @property
+    def username(self):
+        return username(self.userid)
+
+    @property
+    def state(self):
+        return statetostr(self.state_id)
+
+    @property
+    def state_single(self):
+        return statetostr(self.state_id, "S")
+
+    @property
+    def result(self):
+        return resulttostr(self.result_id) if self.result_id else ""
+
+    @property
+    def status(self):
+        if self.state_id == INACTIVE:
+            return self.result
+        return self.state
+
+    @property
+    def status_abbrev(self):
+        if self.state_id == INACTIVE:
+            return resulttostr(self.result_id, "S")
+        return self.state_single
+
+    @property
+    def runtime(self):
+        if self.t_run == 0.0:
+            return 0.0
+        if self.t_cleanup > 0.0:
+            return self.t_cleanup - self.t_run
+        return time.time() - self.t_run
+
+    @property
+    def contextual_time(self):
+        if self.state_single in "DPS":
+            return self.duration
+        return self.runtime
+
+    @property
+    def exception(self):
+        return ExceptionInfo(
+            self.exception_occurred, self.exception_severity, self.exception_type
+        )
+
+
+def records(jobs):
+    """
+    Yield a JobRecord for each job dictionary in the list jobs. The list is
+    emptied as it is read so each dictionary can be freed once converted.
+    """
+    jobs.reverse()
+    while jobs:
+        yield JobRecord(jobs.pop())
@@ -0,0 +1,507 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Node and queue state for sinfo.
+
+fetch() sends the config.get, sched.resource-status and resource.status
+requests together on one handle, then one job-manager.queue-status request
+per queue, and joins the responses into a Resources object. The resource
+sets are read directly from their R (RFC 20) objects, so no resource set
+classes are built.
+
+Sets of ranks are kept as int bitsets (bit n set for rank n), built from the
+idsets of the responses one range at a time. A node state, queue or drain
+reason is one bitset, so grouping nodes by partition, state and reason is a
+few bitwise operations per group, and the node names of a group are written
+as a compressed hostlist from its runs of consecutive ranks. Only -N, which
+prints a line per node, looks at ranks one by one.
+"""
+
+import bisect
+import collections
+import math
+import re
+
+# Slurm node state names: sinfo %t -> %T, in the order sinfo lists them
+STATE_NAMES = {
+    "idle": "idle",
+    "mix": "mixed",
+    "alloc": "allocated",
+    "drng": "draining",
+    "drain": "drained",
+    "down": "down",
+    "n/a": "n/a",
+}
+
+# One line of sinfo output: the nodes of a partition in a state, or sharing
+# a drain reason. default is set for the default partition.
+NodeGroup = collections.namedtuple(
+    "NodeGroup",
+    "partition default avail timelimit nnodes state nodelist reason timestamp",
+)
+
+DEFAULT_QUEUE = "default"
+
+_FSD_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_RUN_RE = re.compile("1+")
+
+
+def idset_mask(idset):
+    """
+    return the bitset of an RFC 22 idset string such as "0-3,7"
+    """
+    # The bits are set as the digits of a base 2 number, so that each range
+    # costs its length and not the length of the whole bitset.
+    digits = bytearray()
+    for item in idset.split(","):
+        if not item:
+            continue
+        lo, _, hi = item.partition("-")
+        lo = int(lo)
+        hi = int(hi or lo)
+        if len(digits) <= hi:
+            digits.extend(b"0" * (hi + 1 - len(digits)))
+        digits[lo : hi + 1] = b"1" * (hi + 1 - lo)
+    return int(digits[::-1], 2) if digits else 0
+
+
+def mask_runs(mask):
+    """
+    yield (first, last) for each run of consecutive ranks in a bitset
+    """
+    # bin() lists the bits from the highest, reversed it is indexed by rank
+    for run in _RUN_RE.finditer(bin(mask)[:1:-1]):
+        yield run.start(), run.end() - 1
+
+
+def mask_ranks(mask):
+    """
+    yield the ranks of a bitset in order
+    """
+    for first, last in mask_runs(mask):
+        yield from range(first, last + 1)
+
+
+def mask_count(mask):
+    """
+    return the number of ranks in a bitset
+    """
+    return bin(mask).count("1")
+
+
+def fsd_seconds(value):
+    """
+    Return the number of seconds of a Flux Standard Duration such as "1h",
+    or of a number of seconds. "inf" and 0 are returned as math.inf, and
+    None if there is no limit, for a missing or empty value.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        unit = value[-1:] if value[-1:] in _FSD_UNITS else ""
+        value = float(value[: len(value) - len(unit)]) * _FSD_UNITS[unit]
+    value = float(value)
+    return math.inf if value == 0 else value
+
+
+def _entries(R):
+    # (bitset, cores per rank) of the R_lite entries of an R object, merged
+    # by number of cores so that each bitset is built once
+    if not R:
+        return []
+    ranks = collections.defaultdict(list)
+    for entry in R.get("execution", {}).get("R_lite", []):
+        cores = mask_count(idset_mask(entry.get("children", {}).get("core", "")))
+        ranks[cores].append(entry["rank"])
+    return [(idset_mask(",".join(idsets)), cores) for cores, idsets in ranks.items()]
+
+
+def _get(data, *keys, default=None):
+    for key in keys:
+        if not isinstance(data, dict) or key not in data:
+            return default
+        data = data[key]
+    return data
+
+
+# a hostlist term: prefix, then optional [ranges] and suffix
+_TERM_RE = re.compile(r"([^,\[\]]*)(?:\[([^\]]*)\])?([^,\[\]]*)")
+_NUMBER_RE = re.compile(r"(.*?)(\d+)$")
+
+
+def _width(digits):
+    # only zero padded numbers have a fixed width
+    return len(digits) if len(digits) > 1 and digits.startswith("0") else 0
+
+
+class NodeNames:
+    """
+    Host names of ranks, read from the compressed hostlists of an R object
+    without expanding them.
+
+    Each run of consecutive host numbers is kept as one segment starting at
+    a rank, so the names of a bitset are encoded run by run.
+    """
+
+    def __init__(self, nodelist, ranks):
+        """
+        Name the ranks of the bitset ranks, in order, with the hosts of
+        nodelist, a list of RFC 29 hostlist strings.
+        """
+        # (prefix, first number or None, width, suffix, count) in host order
+        hosts = []
+        for text in nodelist:
+            for term in _TERM_RE.finditer(text):
+                prefix, ranges, suffix = term.groups()
+                if ranges is not None:
+                    for item in ranges.split(","):
+                        lo, _, hi = item.partition("-")
+                        count = int(hi or lo) - int(lo) + 1
+                        hosts.append((prefix, int(lo), _width(lo), suffix, count))
+                    continue
+                name = prefix + suffix
+                if not name:
+                    continue
+                match = _NUMBER_RE.match(name)
+                if match is None:
+                    hosts.append((name, None, 0, "", 1))
+                else:
+                    digits = match.group(2)
+                    hosts.append((match.group(1), int(digits), _width(digits), "", 1))
+
+        # segments split where host runs or rank runs end, keyed by first rank
+        self.starts = []
+        self.segments = []
+        host = 0
+        for first, last in mask_runs(ranks):
+            while first <= last:
+                if host < len(hosts):
+                    prefix, number, width, suffix, count = hosts[host]
+                else:
+                    # ranks without a host name are shown by number
+                    prefix, number, width, suffix, count = "rank", first, 0, "", 1
+                size = min(count, last - first + 1)
+                self.starts.append(first)
+                self.segments.append((first + size - 1, prefix, number, width, suffix))
+                if size < count:
+                    hosts[host] = (prefix, number + size, width, suffix, count - size)
+                else:
+                    host += 1
+                first += size
+
+    def _pieces(self, first, last):
+        # (prefix, first number, last number, width, suffix) naming the ranks
+        # from first to last that have names
+        index = max(bisect.bisect_right(self.starts, first) - 1, 0)
+        while index < len(self.segments):
+            start = self.starts[index]
+            end, prefix, number, width, suffix = self.segments[index]
+            first = max(first, start)
+            if first > last:
+                break
+            if first <= end:
+                stop = min(end, last)
+                if number is None:
+                    yield prefix, None, None, width, suffix
+                else:
+                    lo, hi = number + first - start, number + stop - start
+                    yield prefix, lo, hi, width, suffix
+                first = stop + 1
+            index += 1
+
+    def names(self):
+        """
+        yield (rank, host name) for each rank in order
+        """
+        for start, segment in zip(self.starts, self.segments):
+            end, prefix, number, width, suffix = segment
+            if number is None:
+                yield start, prefix
+                continue
+            for rank in range(start, end + 1):
+                yield rank, f"{prefix}{number + rank - start:0{width}d}{suffix}"
+
+    def encode(self, mask):
+        """
+        return the compressed hostlist of the ranks of a bitset, e.g.
+        "node[0-3,7]"
+        """
+        # [prefix, width, suffix, [[first, last], ...]] for each output term
+        terms = []
+        for first, last in mask_runs(mask):
+            for prefix, lo, hi, width, suffix in self._pieces(first, last):
+                if lo is None:
+                    terms.append([prefix, None, "", None])
+                    continue
+                if terms and terms[-1][:3] == [prefix, width, suffix]:
+                    ranges = terms[-1][3]
+                    if ranges[-1][1] == lo - 1:
+                        ranges[-1][1] = hi
+                    else:
+                        ranges.append([lo, hi])
+                else:
+                    terms.append([prefix, width, suffix, [[lo, hi]]])
+        out = []
+        for prefix, width, suffix, ranges in terms:
+            if ranges is None:
+                out.append(prefix)
+            elif len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+                out.append(f"{prefix}{ranges[0][0]:0{width}d}{suffix}")
+            else:
+                items = ",".join(
+                    f"{lo:0{width}d}" if lo == hi else f"{lo:0{width}d}-{hi:0{width}d}"
+                    for lo, hi in ranges
+                )
+                out.append(f"{prefix}[{items}]{suffix}")
+        return ",".join(out)
+
+    def max_length(self):
+        """
+        return the length of the longest host name
+        """
+        longest = 0
+        for start, segment in zip(self.starts, self.segments):
+            end, prefix, number, width, suffix = segment
+            if number is not None:
+                prefix += f"{number + end - start:0{width}d}"
+            longest = max(longest, len(prefix) + len(suffix))
+        return longest
+
+
+class Resources:
+    """
+    Node state, drain reasons and queue membership of an instance, as
+    bitsets of ranks.
+    """
+
+    def __init__(self, config, sched_status, status, queue_status):
+        """
+        Join the responses to config.get, sched.resource-status and
+        resource.status, and a dict of queue name -> queue-status response.
+        """
+        R = sched_status.get("all") or {}
+        entries = _entries(R)
+        self.all = 0
+        for mask, _ in entries:
+            self.all |= mask
+        self.hosts = NodeNames(_get(R, "execution", "nodelist", default=[]), self.all)
+
+        # Ranks with all of their cores allocated, and with some of them.
+        full = 0
+        partial = 0
+        for allocated, used in _entries(sched_status.get("allocated")):
+            for mask, cores in entries:
+                overlap = allocated & mask
+                if used >= cores:
+                    full |= overlap
+                else:
+                    partial |= overlap
+        down = 0
+        for mask, _ in _entries(sched_status.get("down")):
+            down |= mask
+
+        # (timestamp, reason) -> drained ranks
+        self.drained = {}
+        drained = 0
+        for idset, info in (status.get("drain") or {}).items():
+            key = (info.get("timestamp", 0.0), info.get("reason", ""))
+            mask = idset_mask(idset) & self.all
+            self.drained[key] = self.drained.get(key, 0) | mask
+            drained |= mask
+
+        # node state -> ranks, each rank in one state
+        used = full | partial
+        up = self.all & ~drained & ~down
+        self.states = {
+            "idle": up & ~used,
+            "mix": up & partial & ~full,
+            "alloc": up & full,
+            "drng": drained & used,
+            "drain": drained & ~used,
+            "down": self.all & down & ~drained,
+        }
+
+        properties = {
+            name: idset_mask(idset)
+            for name, idset in _get(R, "execution", "properties", default={}).items()
+        }
+        limit = _get(config, "policy", "limits", "duration", default=0)
+        self.default_queue = _get(
+            config, "policy", "jobspec", "defaults", "system", "queue"
+        )
+
+        # queue -> (ranks, timelimit, avail), in configuration order
+        self.queues = {}
+        queues = config.get("queues") or {DEFAULT_QUEUE: {}}
+        for name, queue in queues.items():
+            ranks = self.all
+            for prop in queue.get("requires", []):
+                ranks &= properties.get(prop, 0)
+            self.queues[name] = (
+                ranks,
+                fsd_seconds(
+                    _get(queue, "policy", "limits", "duration", default=limit)
+                ),
+                self._avail(queue_status.get(name, {})),
+            )
+        if self.default_queue is None and len(self.queues) == 1:
+            self.default_queue = next(iter(self.queues))
+
+    @staticmethod
+    def _avail(status):
+        # Slurm partition availability from the queue's enable/start flags
+        if not status.get("start", True):
+            return "down"
+        if not status.get("enable", True):
+            return "drain"
+        return "up"
+
+    def reasons(self, mask):
+        """
+        yield (timestamp, reason, ranks) for the drained ranks of a bitset,
+        then (0.0, "", ranks) for the others
+        """
+        for (timestamp, reason), drained in self.drained.items():
+            if mask & drained:
+                yield timestamp, reason, mask & drained
+                mask &= ~drained
+        if mask:
+            yield 0.0, "", mask
+
+
+def fetch(handle):
+    """
+    Return the Resources of the instance at handle. The resource and
+    configuration requests are in flight together, and the queue status
+    requests are sent together once the queue names are known.
+    """
+    config_rpc = handle.rpc("config.get")
+    sched_rpc = handle.rpc("sched.resource-status")
+    status_rpc = handle.rpc("resource.status")
+
+    try:
+        config = config_rpc.get() or {}
+    except OSError:
+        config = {}
+    queues = list(config.get("queues") or {})
+    if queues:
+        queue_rpcs = {
+            name: handle.rpc("job-manager.queue-status", {"name": name})
+            for name in queues
+        }
+    else:
+        queue_rpcs = {DEFAULT_QUEUE: handle.rpc("job-manager.queue-status", {})}
+
+    sched_status = sched_rpc.get() or {}
+    try:
+        status = status_rpc.get() or {}
+    except OSError:
+        status = {}
+    queue_status = {}
+    for name, rpc in queue_rpcs.items():
+        try:
+            queue_status[name] = rpc.get() or {}
+        except OSError:
+            queue_status[name] = {}
+    return Resources(config, sched_status, status, queue_status)
+
+
+def partition_groups(res, partitions=None, by_reason=False):
+    """
+    Yield a NodeGroup for each node state of each partition, or of the named
+    partitions, in configuration order. With by_reason, drained nodes are
+    also grouped by drain reason.
+    """
+    for name, (ranks, limit, avail) in res.queues.items():
+        if partitions is not None and name not in partitions:
+            continue
+        default = name == res.default_queue
+        if not ranks:
+            yield NodeGroup(name, default, avail, limit, 0, "n/a", "", "", 0.0)
+        for state, members in res.states.items():
+            members &= ranks
+            if not members:
+                continue
+            if by_reason:
+                groups = res.reasons(members)
+            else:
+                groups = [(0.0, "", members)]
+            for timestamp, reason, mask in groups:
+                yield NodeGroup(
+                    name,
+                    default,
+                    avail,
+                    limit,
+                    mask_count(mask),
+                    state,
+                    res.hosts.encode(mask),
+                    reason,
+                    timestamp,
+                )
+
+
+def node_groups(res, partitions=None):
+    """
+    Yield a NodeGroup for each node of each partition, or of the named
+    partitions, by node.
+    """
+    # rank -> [(queue, limit, avail), ...], and rank -> state
+    members = collections.defaultdict(list)
+    for name, (ranks, limit, avail) in res.queues.items():
+        if partitions is None or name in partitions:
+            for rank in mask_ranks(ranks):
+                members[rank].append((name, limit, avail))
+    states = {}
+    for state, ranks in res.states.items():
+        states.update(dict.fromkeys(mask_ranks(ranks), state))
+    reasons = {}
+    for (timestamp, reason), ranks in res.drained.items():
+        reasons.update(dict.fromkeys(mask_ranks(ranks), (timestamp, reason)))
+
+    for rank, host in res.hosts.names():
+        if rank not in members:
+            continue
+        timestamp, reason = reasons.get(rank, (0.0, ""))
+        for name, limit, avail in members[rank]:
+            yield NodeGroup(
+                name,
+                name == res.default_queue,
+                avail,
+                limit,
+                1,
+                states[rank],
+                host,
+                reason,
+                timestamp,
+            )
+
+
+def drain_groups(res):
+    """
+    yield a NodeGroup for the drained nodes in each state sharing each
+    reason and time
+    """
+    for (timestamp, reason), drained in res.drained.items():
+        for state in ("drng", "drain"):
+            mask = drained & res.states[state]
+            if mask:
+                yield NodeGroup(
+                    "",
+                    False,
+                    "",
+                    None,
+                    mask_count(mask),
+                    state,
+                    res.hosts.encode(mask),
+                    reason,
+                    timestamp,
+                )
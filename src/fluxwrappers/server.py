@@ -0,0 +1,432 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Resident per-user server that runs the wrappers with warm imports.
+
+Each wrapper invocation normally starts an interpreter, imports the flux
+bindings and connects to the broker before doing any work. The server is
+started once per user and instance with
+
+    flux python -m fluxwrappers.server
+
+and keeps the bindings and the wrapper modules imported, with a broker
+handle opened ahead of the next request. When it is running, squeue, showq,
+sinfo and scancel forward their arguments, environment and standard input,
+output and error (passed as file descriptors) over a Unix socket. The server forks
+a child that runs the wrapper on the warm state and writes straight to the
+caller's terminal or pipe, and the exit status is sent back. If no server is
+running the wrappers run in process as usual.
+
+The socket is in a per-user directory only the user can access. Both ends
+check the directory and each other's user before anything is exchanged, and
+the wrappers run in process if the checks fail. Setting
+FLUX_WRAPPERS_SERVER=0 disables forwarding, which is also how the children
+of the server avoid forwarding to it again.
+"""
+
+import os
+import socket
+import stat
+import struct
+import sys
+
+# Modules imported by the server so that its children start with them loaded.
+PRELOAD = [
+    "argparse",
+    "flux",
+    "flux.job",
+    "flux.hostlist",
+    "flux.job.info",
+    "fluxwrappers.cache",
+    "fluxwrappers.connection",
+    "fluxwrappers.format",
+    "fluxwrappers.help",
+    "fluxwrappers.jobids",
+    "fluxwrappers.output",
+    "fluxwrappers.record",
+    "fluxwrappers.resources",
+    "fluxwrappers.states",
+    "fluxwrappers.table",
+    "fluxwrappers.timing",
+]
+
+# Seconds without requests after which the server exits.
+IDLE_TIMEOUT = 3600.0
+
+# Largest request accepted, mostly the caller's environment.
+MAX_REQUEST = 1 << 20
+
+_INT = struct.Struct("!i")
+
+
+def socket_path(uri=None):
+    """
+    Return the path of the server socket for the instance at uri, by
+    default FLUX_URI, in the per-user runtime directory.
+    """
+    import zlib
+
+    if uri is None:
+        uri = os.environ.get("FLUX_URI", "")
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    name = f"server-{zlib.crc32(uri.encode()):08x}.sock"
+    return os.path.join(base, f"flux-wrappers-{os.getuid()}", name)
+
+
+def _is_private(path, kind):
+    """
+    return True if path is a file of kind, a stat.S_IS* test, owned by
+    this user without a symbolic link and not accessible to anyone else
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return kind(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _recv_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def _recv_int(sock):
+    return _INT.unpack(_recv_exactly(sock, _INT.size))[0]
+
+
+def forward(script, argv):
+    """
+    Run script with argv in the resident server, if one is running for this
+    user and instance, and return its exit status. Return None if there is
+    no server to run it, in which case the caller runs it itself.
+    """
+    if os.environ.get("FLUX_WRAPPERS_SERVER") == "0":
+        return None
+    import json
+
+    # The environment and terminal only go to a server of this user, in a
+    # directory no one else could have created or replaced the socket in.
+    path = socket_path()
+    if not (
+        _is_private(os.path.dirname(path), stat.S_ISDIR)
+        and _is_private(path, stat.S_ISSOCK)
+    ):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        if _peer_uid(sock) != os.getuid():
+            raise PermissionError
+    except OSError:
+        sock.close()
+        return None
+
+    umask = os.umask(0)
+    os.umask(umask)
+    request = json.dumps(
+        {
+            "script": os.path.abspath(script),
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "umask": umask,
+            "env": dict(os.environ),
+        }
+    ).encode()
+    with sock:
+        try:
+            # stdin, stdout and stderr go with the first byte of the request
+            sock.sendmsg(
+                [_INT.pack(len(request))],
+                [(socket.SOL_SOCKET, socket.SCM_RIGHTS, struct.pack("3i", 0, 1, 2))],
+            )
+            sock.sendall(request)
+            pid = _recv_int(sock)
+        except (OSError, EOFError):
+            return None
+        if pid < 0:
+            return None
+
+        # Interrupts are passed on to the child running the command.
+        while True:
+            try:
+                return _recv_int(sock)
+            except KeyboardInterrupt:
+                import signal
+
+                try:
+                    os.kill(pid, signal.SIGINT)
+                except OSError:
+                    return 130
+            except (OSError, EOFError):
+                return 1
+
+
+def _peer_uid(conn):
+    creds = conn.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    return struct.unpack("3i", creds)[1]
+
+
+def _receive(conn):
+    """
+    return the request and file descriptors sent by forward()
+    """
+    import array
+    import json
+
+    fds = array.array("i")
+    header, ancdata, _, _ = conn.recvmsg(
+        _INT.size, socket.CMSG_SPACE(3 * fds.itemsize)
+    )
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - len(data) % fds.itemsize])
+    try:
+        if len(header) != _INT.size or len(fds) != 3:
+            raise EOFError
+        size = _INT.unpack(header)[0]
+        if not 0 < size <= MAX_REQUEST:
+            raise EOFError
+        return json.loads(_recv_exactly(conn, size)), list(fds)
+    except BaseException:
+        for fd in fds:
+            os.close(fd)
+        raise
+
+
+def _watch(conn):
+    # The caller went away, stop the command as if it was interrupted.
+    import _thread
+
+    try:
+        while conn.recv(64):
+            pass
+    except OSError:
+        pass
+    _thread.interrupt_main()
+
+
+def _compile(script, scripts):
+    """
+    return the code of script, compiled once per modification in the server
+    so that its children do not compile it again
+    """
+    mtime = os.stat(script).st_mtime_ns
+    cached = scripts.get(script)
+    if cached is None or cached[0] != mtime:
+        with open(script, "rb") as fp:
+            cached = scripts[script] = (mtime, compile(fp.read(), script, "exec"))
+    return cached[1]
+
+
+def _run(conn, request, fds, handle, code):
+    """
+    run a forwarded command in a forked child and send its exit status
+    """
+    import signal
+    import threading
+    import traceback
+
+    from fluxwrappers import connection
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = open(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+
+    status = 1
+    try:
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.environ["FLUX_WRAPPERS_SERVER"] = "0"
+        os.umask(request["umask"])
+        os.chdir(request["cwd"])
+        connection._handle = handle
+        conn.sendall(_INT.pack(os.getpid()))
+        threading.Thread(target=_watch, args=(conn,), daemon=True).start()
+        sys.argv = [request["script"]] + request["argv"]
+        exec(code, {"__name__": "__main__", "__file__": request["script"]})
+        status = 0
+    except SystemExit as exc:
+        if exc.code is None:
+            status = 0
+        elif isinstance(exc.code, int):
+            status = exc.code
+        else:
+            print(exc.code, file=sys.stderr)
+    except KeyboardInterrupt:
+        status = 130
+    except BaseException:
+        traceback.print_exc()
+
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except OSError:
+            pass
+    try:
+        conn.sendall(_INT.pack(status))
+    except OSError:
+        pass
+    os._exit(0)
+
+
+def _spare_handle():
+    # The next child gets a handle that is already connected.
+    from fluxwrappers.connection import connect
+
+    try:
+        return connect()
+    except OSError:
+        return None
+
+
+def _listen(path):
+    """
+    return a socket listening at path, or None if a server is running there
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not _is_private(directory, stat.S_ISDIR):
+        raise PermissionError(f"{directory} is not private to this user")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return None
+    except OSError:
+        pass
+    finally:
+        probe.close()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    sock.listen(64)
+    return sock
+
+
+def serve(idle_timeout=IDLE_TIMEOUT):
+    """
+    Serve forwarded commands until there have been none for idle_timeout
+    seconds. Returns 1 if a server is already running, 0 otherwise.
+    """
+    import importlib
+    import signal
+    import time
+
+    path = socket_path()
+    sock = _listen(path)
+    if sock is None:
+        print(f"{__name__}: a server is already listening on {path}", file=sys.stderr)
+        return 1
+    inode = os.stat(path).st_ino
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    for name in PRELOAD:
+        importlib.import_module(name)
+    uri = os.environ.get("FLUX_URI", "")
+    handle = _spare_handle()
+    children = set()
+    scripts = {}
+    last = time.monotonic()
+    sock.settimeout(1.0)
+    try:
+        while children or time.monotonic() - last < idle_timeout:
+            while children:
+                try:
+                    pid, _ = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    children.clear()
+                    break
+                if pid == 0:
+                    break
+                children.discard(pid)
+            try:
+                conn, _ = sock.accept()
+            except socket.timeout:
+                continue
+            last = time.monotonic()
+            with conn:
+                conn.settimeout(5.0)
+                try:
+                    if _peer_uid(conn) != os.getuid():
+                        continue
+                    request, fds = _receive(conn)
+                except (OSError, EOFError, ValueError):
+                    continue
+                try:
+                    # Commands for another instance run in their caller.
+                    if request.get("env", {}).get("FLUX_URI", "") != uri:
+                        conn.sendall(_INT.pack(-1))
+                        continue
+                    code = _compile(request["script"], scripts)
+                    conn.settimeout(None)
+                    pid = os.fork()
+                    if pid == 0:
+                        try:
+                            sock.close()
+                            _run(conn, request, fds, handle, code)
+                        finally:
+                            os._exit(1)
+                    children.add(pid)
+                    handle = None
+                except (OSError, SyntaxError, ValueError):
+                    continue
+                finally:
+                    for fd in fds:
+                        os.close(fd)
+            if handle is None:
+                handle = _spare_handle()
+    finally:
+        sock.close()
+        try:
+            if os.stat(path).st_ino == inode:
+                os.unlink(path)
+        except OSError:
+            pass
+    return 0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog=f"flux python -m {__name__}",
+        description="Run squeue, showq, sinfo and scancel with warm imports.",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        metavar="<seconds>",
+        type=float,
+        default=IDLE_TIMEOUT,
+        help="exit after this many seconds without requests",
+    )
+    args = parser.parse_args()
+    return serve(args.idle_timeout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Mappings between Slurm job state names and Flux job states.
+"""
+
+# squeue -t state names and aliases to job-list state filters.
+SQUEUE_STATES = {
+    "running": "running",
+    "r": "running",
+    "pending": "pending",
+    "pd": "pending",
+    "all": "active,inactive",
+    "f": "failed",
+    "cg": "cleanup",
+    "completing": "cleanup",
+    "ca": "canceled",
+    "cancelled": "canceled",
+    "to": "timeout",
+    "timeout": "timeout",
+    "cd": "completed",
+    "completed": "completed",
+}
+
+# scancel -t state names and aliases to job-list state filters.
+SCANCEL_STATES = {
+    "running": "running",
+    "r": "running",
+    "pending": "pending",
+    "pd": "pending",
+}
+
+# Job states and results selected by each job-list state filter name, used
+# to apply the same filters to jobs that are looked up one at a time.
+STATE_FILTERS = {
+    "pending": {"DEPEND", "PRIORITY", "SCHED"},
+    "running": {"RUN", "CLEANUP"},
+    "cleanup": {"CLEANUP"},
+    "active": {"DEPEND", "PRIORITY", "SCHED", "RUN", "CLEANUP"},
+    "inactive": {"INACTIVE"},
+}
+RESULT_FILTERS = {"completed", "failed", "canceled", "timeout"}
+
+
+def listed_states(filters):
+    """
+    Return the set of Flux job states that job-list returns for a list of
+    state and result filters, such as ["pending", "running"].
+    """
+    states = set()
+    for name in ",".join(filters).split(","):
+        if name in RESULT_FILTERS:
+            states.add("INACTIVE")
+        else:
+            states.update(STATE_FILTERS.get(name, ()))
+    return states
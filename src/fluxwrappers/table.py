@@ -0,0 +1,296 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Columnar job table for sorting and counting jobs.
+
+Each sortable field of the jobs is stored in an array module column, with
+strings interned into integer codes, so multi-key sorts and per-group counts
+work on machine integers and floats instead of comparing job objects. If
+NumPy is installed it is used for large tables.
+"""
+
+import time
+from array import array
+
+from fluxwrappers.record import username
+
+# Tables with at least this many rows are sorted and counted with NumPy if it
+# is available. Below that importing NumPy costs more than it saves.
+NUMPY_MIN_ROWS = 20000
+
+# Status abbreviations in the order of the job life cycle, used for the
+# columns of summarize().
+STATUS_ORDER = ["D", "P", "S", "R", "C", "CD", "F", "CA", "TO"]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class StringColumn:
+    """
+    Strings stored as integer codes into a list of distinct values.
+    """
+
+    def __init__(self):
+        self.codes = array("l")
+        self.values = []
+        self._index = {}
+
+    def append(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def ranks(self):
+        """
+        return a column of the rank of each row's string in sorted order
+        """
+        rank = [0] * len(self.values)
+        for i, code in enumerate(
+            sorted(range(len(self.values)), key=self.values.__getitem__)
+        ):
+            rank[code] = i
+        return array("l", map(rank.__getitem__, self.codes))
+
+
+class JobTable:
+    """
+    The sortable fields of a list of JobRecords, one column per field.
+    """
+
+    # sort key (squeue -S letter) -> column name
+    sort_keys = {
+        "i": "id",
+        "P": "queue",
+        "j": "name",
+        "u": "user",
+        "a": "user",
+        "t": "state",
+        "M": "runtime",
+        "D": "nnodes",
+        "p": "priority",
+        "R": "reason",
+    }
+
+    # sort key -> job-list attributes needed to fill its column
+    sort_attrs = {
+        "i": [],
+        "P": ["queue"],
+        "j": ["name"],
+        "u": ["userid"],
+        "a": ["userid"],
+        "t": ["state", "result"],
+        "M": ["t_run", "t_cleanup"],
+        "D": ["nnodes"],
+        "p": ["priority"],
+        "R": ["annotations", "nodelist"],
+    }
+
+    # columns and job-list attributes needed by summarize()
+    summary_columns = ["queue", "status", "nnodes"]
+    summary_attrs = ["queue", "state", "result", "nnodes"]
+
+    # column name -> array typecode, or None for a StringColumn
+    column_types = {
+        "id": "q",
+        "state": "l",
+        "status": None,
+        "runtime": "d",
+        "nnodes": "q",
+        "priority": "q",
+        "queue": None,
+        "name": None,
+        "user": None,
+        "reason": None,
+    }
+
+    def __init__(self, jobs, columns=None):
+        """
+        Load jobs, an iterable of JobRecords, filling only the named columns
+        (by default all of them).
+        """
+        if columns is None:
+            columns = self.column_types
+        now = time.time()
+        getters = {
+            "id": lambda job: job.id,
+            # Inactive jobs sort after all others, by result.
+            "state": lambda job: job.state_id << 8 | job.result_id,
+            "status": lambda job: job.status_abbrev,
+            "runtime": lambda job: (
+                0.0
+                if job.t_run == 0.0
+                else (job.t_cleanup or now) - job.t_run
+            ),
+            "nnodes": lambda job: job.nnodes or 0,
+            "priority": lambda job: job.priority or 0,
+            "queue": lambda job: job.queue,
+            "name": lambda job: job.name,
+            "user": lambda job: job.userid,
+            "reason": lambda job: job.reason or job.nodelist,
+        }
+        self.columns = {}
+        appenders = []
+        for name in columns:
+            typecode = self.column_types[name]
+            column = StringColumn() if typecode is None else array(typecode)
+            self.columns[name] = column
+            appenders.append((column.append, getters[name]))
+
+        self.jobs = []
+        for job in jobs:
+            self.jobs.append(job)
+            for append, getter in appenders:
+                append(getter(job))
+
+        # User ids are replaced by names so users sort by name.
+        if "user" in self.columns:
+            user = self.columns["user"]
+            user.values = [username(uid) for uid in user.values]
+
+    def __len__(self):
+        return len(self.jobs)
+
+    @classmethod
+    def parse_sort(cls, spec):
+        """
+        Return a list of (key, descending) pairs for a squeue -S
+        specification such as "-t,P,+u". Raises ValueError for an unknown
+        key.
+        """
+        keys = []
+        for field in spec.split(","):
+            field = field.strip()
+            descending = field.startswith("-")
+            key = field.lstrip("+-")
+            if key not in cls.sort_keys:
+                raise ValueError(key)
+            keys.append((key, descending))
+        return keys
+
+    @classmethod
+    def sort_columns(cls, keys):
+        """
+        return the names of the columns needed to sort by keys
+        """
+        return list(dict.fromkeys(cls.sort_keys[key] for key, _ in keys))
+
+    def _sort_column(self, key):
+        column = self.columns[self.sort_keys[key]]
+        if isinstance(column, StringColumn):
+            return column.ranks()
+        return column
+
+    def order(self, keys):
+        """
+        return the row indices sorted by keys, a list from parse_sort()
+        """
+        np = _numpy() if len(self) >= NUMPY_MIN_ROWS else None
+        if np is not None:
+            # lexsort sorts by its last key first, and descending order is
+            # an ascending sort of the negated column.
+            columns = []
+            for key, descending in reversed(keys):
+                column = self._sort_column(key)
+                column = np.frombuffer(column, dtype=column.typecode)
+                columns.append(-column if descending else column)
+            return np.lexsort(columns).tolist()
+
+        # Stable sorts from the least significant key give the same order,
+        # with each comparison on a C array element.
+        rows = list(range(len(self)))
+        for key, descending in reversed(keys):
+            rows.sort(key=self._sort_column(key).__getitem__, reverse=descending)
+        return rows
+
+    def sorted(self, keys):
+        """
+        yield the jobs sorted by keys, a list from parse_sort()
+        """
+        jobs = self.jobs
+        for row in self.order(keys):
+            yield jobs[row]
+
+    def summarize(self):
+        """
+        Return a list of (partition, jobs, nodes, {status: count}) tuples,
+        one per partition in sorted order, where nodes is the number of
+        nodes used by running and completing jobs.
+        """
+        queue = self.columns["queue"]
+        status = self.columns["status"]
+        nqueues = len(queue.values)
+        nstatus = len(status.values)
+        running = [value in ("R", "C") for value in status.values]
+
+        np = _numpy() if len(self) >= NUMPY_MIN_ROWS else None
+        if np is not None:
+            qcodes = np.frombuffer(queue.codes, dtype="l")
+            scodes = np.frombuffer(status.codes, dtype="l")
+            counts = np.bincount(
+                qcodes * nstatus + scodes, minlength=nqueues * nstatus
+            ).reshape(nqueues, nstatus)
+            inuse = np.asarray(running, dtype=bool)[scodes]
+            nodes = np.bincount(
+                qcodes[inuse],
+                weights=np.frombuffer(self.columns["nnodes"], dtype="q")[inuse],
+                minlength=nqueues,
+            )
+            counts = counts.tolist()
+            nodes = [int(n) for n in nodes]
+        else:
+            counts = [[0] * nstatus for _ in range(nqueues)]
+            nodes = [0] * nqueues
+            for qcode, scode, nnodes in zip(
+                queue.codes, status.codes, self.columns["nnodes"]
+            ):
+                counts[qcode][scode] += 1
+                if running[scode]:
+                    nodes[qcode] += nnodes
+
+        summary = []
+        for qcode in sorted(range(nqueues), key=queue.values.__getitem__):
+            bystatus = {
+                status.values[scode]: count
+                for scode, count in enumerate(counts[qcode])
+                if count
+            }
+            summary.append(
+                (queue.values[qcode], sum(bystatus.values()), nodes[qcode], bystatus)
+            )
+        return summary
+
+    @staticmethod
+    def format_summary(summary):
+        """
+        return the lines of a per-partition table of job counts by status
+        """
+        present = set()
+        for _, _, _, bystatus in summary:
+            present.update(bystatus)
+        statuses = [s for s in STATUS_ORDER if s in present]
+        statuses += sorted(present - set(statuses))
+        width = max([len("PARTITION")] + [len(q) for q, _, _, _ in summary])
+
+        lines = [
+            f"{'PARTITION':<{width}} {'JOBS':>7} {'NODES':>7}"
+            + "".join(f" {s:>7}" for s in statuses)
+        ]
+        for queue, njobs, nnodes, bystatus in summary:
+            lines.append(
+                f"{queue or '-':<{width}} {njobs:>7} {nnodes:>7}"
+                + "".join(f" {bystatus.get(s, 0):>7}" for s in statuses)
+            )
+        return lines
@@ -0,0 +1,204 @@
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+"""
+Per-phase timing of wrapper invocations.
+
+Timing is enabled with the --timing option or by setting
+FLUX_WRAPPERS_PROFILE. If FLUX_WRAPPERS_PROFILE is "1" or "stderr" the
+breakdown is printed to stderr, and if it is unset, empty, "0", "off" or
+"no" timing is disabled. Any other value is taken as the path of a file
+to which one JSON record is appended per invocation, so that records from
+many invocations can be collected and compared.
+
+Time is charged to the innermost phase that is running, so nested phases
+(for example jobs being decoded while the output is written) are not
+counted twice and the phases add up to the total.
+"""
+
+import os
+import sys
+import time
+
+_current = None
+
+
+def current():
+    """
+    return the Timer of the running command, or a disabled Timer
+    """
+    global _current
+    if _current is None:
+        _current = Timer(None)
+    return _current
+
+
+class Timer:
+    """
+    Accumulates exclusive time per phase and named counters.
+
+    A Timer without an output does nothing, so the wrappers can call it
+    unconditionally. Used as a context manager it becomes the current()
+    timer, optionally runs cProfile, and reports when the command exits.
+    """
+
+    def __init__(self, command, output=None, profile=None):
+        self.command = command
+        self.output = output
+        self.profile = profile
+        self.enabled = output is not None
+        self.phases = {}
+        self.counts = {}
+        self._stack = []
+        self._start = time.perf_counter()
+        self._profiler = None
+
+    @classmethod
+    def from_environment(cls, command, timing=False, profile=None):
+        """
+        Return a Timer for command reporting to stderr if timing is set,
+        or as configured by FLUX_WRAPPERS_PROFILE.
+        """
+        output = os.environ.get("FLUX_WRAPPERS_PROFILE", "")
+        if output.lower() in ("", "0", "off", "no"):
+            output = None
+        elif output in ("1", "stderr"):
+            output = "stderr"
+        if timing:
+            output = "stderr"
+        return cls(command, output, profile)
+
+    def __enter__(self):
+        global _current
+        _current = self
+        self._start = time.perf_counter()
+        if self.profile is not None:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _current
+        if self._profiler is not None:
+            self._profiler.disable()
+            try:
+                self._profiler.dump_stats(self.profile)
+            except OSError as err:
+                print(
+                    f"{self.command}: cannot write {self.profile}: {err}",
+                    file=sys.stderr,
+                )
+        if self.enabled:
+            self.report()
+        _current = None
+        return False
+
+    def push(self, name):
+        """
+        start charging time to phase name
+        """
+        if self.enabled:
+            self._stack.append([name, time.perf_counter(), 0.0])
+
+    def pop(self):
+        """
+        stop charging time to the most recently pushed phase
+        """
+        if self.enabled:
+            name, start, inner = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - inner
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def phase(self, name):
+        """
+        return a context manager charging the time spent in it to name
+        """
+        return _Phase(self, name)
+
+    def wrap(self, name, iterable, count=None):
+        """
+        Charge the time spent producing each item of iterable to phase name,
+        and count the items under count if given.
+        """
+        if not self.enabled:
+            return iterable
+        return self._wrap(name, iter(iterable), count)
+
+    def _wrap(self, name, iterator, count):
+        while True:
+            self.push(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.pop()
+            if count is not None:
+                self.count(count)
+            yield item
+
+    def count(self, name, value=1):
+        """
+        add value to counter name
+        """
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def report(self):
+        """
+        print the breakdown to stderr or append it to the output file
+        """
+        total = time.perf_counter() - self._start
+        other = total - sum(self.phases.values())
+        if self.output == "stderr":
+            print(f"{self.command}: timing:", file=sys.stderr)
+            for name, seconds in self.phases.items():
+                print(f"  {name:<10} {seconds:>10.4f}s", file=sys.stderr)
+            print(f"  {'other':<10} {other:>10.4f}s", file=sys.stderr)
+            print(f"  {'total':<10} {total:>10.4f}s", file=sys.stderr)
+            for name, value in self.counts.items():
+                print(f"  {name:<10} {value:>10}", file=sys.stderr)
+            return
+
+        import json
+
+        record = {
+            "command": self.command,
+            "argv": sys.argv[1:],
+            "time": time.time(),
+            "uri": os.environ.get("FLUX_URI"),
+            "phases": dict(self.phases, other=other),
+            "total": total,
+            "counts": self.counts,
+        }
+        try:
+            with open(self.output, "a") as fp:
+                fp.write(json.dumps(record) + "\n")
+        except OSError as err:
+            print(
+                f"{self.command}: cannot write {self.output}: {err}", file=sys.stderr
+            )
+
+
+class _Phase:
+    __slots__ = ("timer", "name")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer.push(self.name)
+        return self.timer
+
+    def __exit__(self, *exc_info):
+        self.timer.pop()
+        return False
@@ -2,15 +2,25 @@
 
 use strict;
 use warnings;
-use Getopt::Long qw(:config no_ignore_case no_auto_abbrev);
+use Getopt::Long qw(:config no_ignore_case no_auto_abbrev pass_through);
 use File::Basename;
+use File::Find;
+use File::Spec;
+use File::Temp qw(tempfile);
+use Digest::SHA;
 
 sub print_usage(){
-    print "Usage: $0 SOURCE DEST\n";
-    print " Copy a file into DEST on all nodes in allocation.\n\n";
+    print "Usage: $0 [OPTIONS] SOURCE... DEST\n";
+    print " Copy files and directories into DEST on all nodes in allocation.\n";
+    print " Absolute SOURCEs are copied to DEST/NAME, relative ones keep their path\n";
+    print " under DEST.\n\n";
     print " Options:\n";
-    print "  -j|--jobid=JOBID  run in a specific job (optional if already in an allocation)\n";
-    print "  -v|--verbose      show underlying flux commands\n";
+    print "  -j|--jobid=JOBID     run in a specific job (optional if already in an allocation)\n";
+    print "  -f|--force           overwrite files that already exist in DEST\n";
+    print "  -u|--update          only copy to nodes where files in DEST differ in size or mtime\n";
+    print "  -c|--checksum        with --update, compare sha256 checksums instead\n";
+    print "  --chunksize=N        split files into N byte blobs in the archive\n";
+    print "  -v|--verbose         show underlying flux commands\n";
     exit 1;
 }
 
@@ -30,67 +40,265 @@ sub check_allocation(){
     }
 }
 
-sub run_and_extract($$$$){
-    my ($source, $dest, $jobid, $verbose) = @_;
-    my $proxycmd = "";
-    if( $jobid ){
-        $proxycmd = "flux proxy $jobid ";
+my %opts = (
+    jobid => "",
+    verbose => 0,
+);
+
+# process groups of the commands running in the background
+my %running;
+
+# the command as run, through flux proxy when a job is given
+sub flux_command(@){
+    my @cmd = ("flux", @_);
+    if( $opts{jobid} ){
+        unshift @cmd, "flux", "proxy", $opts{jobid};
+    }
+    if( $opts{verbose} ){
+        print "#running: @cmd\n";
+    }
+    return @cmd;
+}
+
+# start a command in the background, in its own process group so that it
+# can be stopped with the commands it runs
+sub spawn(&){
+    my ($code) = @_;
+    my $pid = fork();
+    die "$0 couldn't fork: $!\n" unless defined $pid;
+    if( $pid == 0 ){
+        setpgrp(0, 0);
+        $code->();
+        exit 127;
     }
-    my $sourcearg = "$source";
-    if( $source =~ /\~?^\// ){
-        my( $filename, $dirname, $suffix) = fileparse($source);
-        $sourcearg = "-C $dirname $filename";
-        if( $suffix ){
-            $sourcearg .= $suffix;
+    $running{$pid} = 1;
+    return $pid;
+}
+
+sub finish($){
+    my ($pid) = @_;
+    waitpid($pid, 0);
+    delete $running{$pid};
+    return $?;
+}
+
+sub stop($){
+    my ($pid) = @_;
+    kill 'TERM', -$pid;
+    return finish($pid);
+}
+
+# Absolute sources are archived relative to their directory, so that they
+# are extracted as DEST/NAME, with one archive per source directory.
+# Relative sources keep their path, DEST/a/b/NAME for a/b/NAME, and share
+# one archive created from the current directory.
+sub group_sources(@){
+    my @groups;
+    my %bydir;
+    foreach my $source (@_){
+        $source =~ s{(?<=.)/+$}{};
+        unless( -e $source ){
+            print "Error: $0: $source does not exist. Exiting.\n";
+            exit 1;
         }
+        my( $name, $dirname ) = ( $source, "./" );
+        if( $source =~ m{^/} ){
+            ( $name, $dirname ) = fileparse($source);
+        }
+        unless( exists $bydir{$dirname} ){
+            push @groups, [$dirname];
+            $bydir{$dirname} = $groups[-1];
+        }
+        push @{$bydir{$dirname}}, $name;
     }
-    my $createcmd = $proxycmd."flux archive create $sourcearg";
-    if( $verbose ){
-        print "#running: $createcmd\n";
+    return @groups;
+}
+
+# One line per regular file under the sources, relative to DEST: "SIZE MTIME
+# PATH" to compare with stat, or "SHA256  PATH" for sha256sum --check.
+sub manifest($@){
+    my ($check, @groups) = @_;
+    my @lines;
+    foreach my $group (@groups){
+        my ($dirname, @names) = @$group;
+        my $wanted = sub {
+            return if -l $_ or not -f _;
+            my $path = File::Spec->abs2rel($File::Find::name, $dirname);
+            if( $check eq "checksum" ){
+                my $digest = Digest::SHA->new(256)->addfile($File::Find::name, "b");
+                push @lines, $digest->hexdigest."  $path\n";
+            }else{
+                my @st = stat(_);
+                push @lines, "$st[7] $st[9] $path\n";
+            }
+        };
+        find({ wanted => $wanted, no_chdir => 1 }, map { "$dirname$_" } @names);
     }
-    `$createcmd`;
-    my $mkdircmd = $proxycmd."flux exec -r all mkdir -p $dest";
-    if( $verbose ){
-        print "#running: $mkdircmd\n";
+    return @lines;
+}
+
+my $check_size = <<'EOF';
+cd "$1" 2>/dev/null || { echo stale; exit 0; }
+while read -r size mtime path; do
+    [ "$(stat -c '%s %Y' -- "$path" 2>/dev/null)" = "$size $mtime" ] || { echo stale; exit 0; }
+done
+EOF
+
+my $check_checksum = <<'EOF';
+cd "$1" 2>/dev/null && sha256sum --check --status || echo stale
+EOF
+
+# Return the idset of the ranks where DEST does not match the manifest.
+# Each rank reads the manifest from stdin, which flux exec broadcasts.
+sub stale_ranks($$@){
+    my ($check, $dest, @lines) = @_;
+    my ($fh, $manifest) = tempfile(UNLINK => 1);
+    print $fh @lines;
+    close $fh;
+    my $script = $check eq "checksum" ? $check_checksum : $check_size;
+    my @cmd = flux_command("exec", "-r", "all", "--label-io", "sh", "-c", $script, "sh", $dest);
+    my $pid = open(my $out, "-|") // die "$0 couldn't fork: $!\n";
+    if( $pid == 0 ){
+        open(STDIN, "<", $manifest) or exit 127;
+        exec { $cmd[0] } @cmd or exit 127;
     }
-    `$mkdircmd`;
-    my $extractcmd = $proxycmd."flux exec -r all flux archive extract --waitcreate -C $dest";
-    if( $verbose ){
-        print "#running: $extractcmd\n";
+    my @ranks;
+    while( my $line = <$out> ){
+        if( $line =~ /^(\d+): stale$/ ){
+            push @ranks, $1;
+        }
     }
-    `$extractcmd`;
-    my $removecmd = $proxycmd."flux archive remove";
-    if( $verbose ){
-        print "#running: $removecmd\n";
+    # if the check itself failed, copy everywhere
+    close $out or return "all";
+    @ranks = sort { $a <=> $b } @ranks;
+    my @ranges;
+    foreach my $rank (@ranks){
+        if( @ranges and $ranges[-1][1] == $rank - 1 ){
+            $ranges[-1][1] = $rank;
+        }else{
+            push @ranges, [$rank, $rank];
+        }
     }
-    `$removecmd`;
-    if( $verbose ){
+    return join ",", map { $$_[0] == $$_[1] ? $$_[0] : "$$_[0]-$$_[1]" } @ranges;
+}
+
+# Create the archives one after another, in a background process so that
+# the nodes can start waiting for them meanwhile.
+sub start_create($@){
+    my ($names, @groups) = @_;
+    my @cmds;
+    foreach my $ii (0 .. $#groups){
+        my ($dirname, @paths) = @{$groups[$ii]};
+        my @args = ("archive", "create", "--name=$$names[$ii]", "-C", $dirname);
+        if( $opts{chunksize} ){
+            push @args, "--chunksize=$opts{chunksize}";
+        }
+        push @cmds, [flux_command(@args, "--", @paths)];
+    }
+    return spawn {
+        foreach my $cmd (@cmds){
+            system { $$cmd[0] } @$cmd;
+            exit 1 if $?;
+        }
+        exit 0;
+    };
+}
+
+# Every node makes DEST and extracts the archives as they are created, in
+# a single flux exec.
+sub start_extract($$@){
+    my ($ranks, $dest, @names) = @_;
+    my $overwrite = ( $opts{force} or $opts{update} ) ? " --overwrite" : "";
+    my $script = 'dest=$1; shift; mkdir -p "$dest" || exit 1; '
+        .'for name; do flux archive extract --name="$name" --waitcreate -C "$dest"'
+        .$overwrite.' || exit 1; done';
+    my @cmd = flux_command("exec", "-r", $ranks, "-n", "sh", "-c", $script, "sh", $dest, @names);
+    return spawn { exec { $cmd[0] } @cmd };
+}
+
+sub remove_archives(@){
+    foreach my $name (@_){
+        my @cmd = flux_command("archive", "remove", "-f", "--name=$name");
+        system { $cmd[0] } @cmd;
+    }
+}
+
+sub broadcast($@){
+    my ($dest, @sources) = @_;
+    my @groups = group_sources(@sources);
+    my $unique = "fsbcast-$$-".time();
+    my @names = map { "$unique-$_" } (0 .. $#groups);
+    my $status = 0;
+
+    local $SIG{INT} = sub {
+        stop($_) foreach keys %running;
+        remove_archives(@names);
+        exit 130;
+    };
+
+    my $create = start_create(\@names, @groups);
+    my $ranks = "all";
+    if( $opts{update} ){
+        # the nodes are checked while the archives are being created
+        $ranks = stale_ranks($opts{update}, $dest, manifest($opts{update}, @groups));
+        unless( $ranks ){
+            stop($create);
+            remove_archives(@names);
+            if( $opts{verbose} ){
+                print "#$dest is up to date on all nodes\n";
+            }
+            return 0;
+        }
+        if( $opts{verbose} ){
+            print "#copying to ranks $ranks\n";
+        }
+    }
+    my $extract = start_extract($ranks, $dest, @names);
+    if( finish($create) ){
+        print "Error: $0 couldn't create the archive of @sources.\n";
+        stop($extract);
+        $status = 1;
+    }elsif( finish($extract) ){
+        print "Error: $0 couldn't extract into $dest on all nodes.\n";
+        $status = 1;
+    }
+    remove_archives(@names);
+    if( $opts{verbose} ){
         print "#done\n";
     }
+    return $status;
 }
 
 ### Main ###
 
+GetOptions(
+    "j|jobid=s"     => \$opts{jobid},
+    "f|force"       => \$opts{force},
+    "u|update"      => \$opts{update},
+    "c|checksum"    => \$opts{checksum},
+    "chunksize=s"   => \$opts{chunksize},
+    "v|verbose"     => \$opts{verbose},
+    "h|help"        => \&print_usage,
+);
+
+my @extraargs = grep { /^-./ } @ARGV;
+@ARGV = grep { !/^-./ } @ARGV;
+if( @extraargs ){
+    print_warn( join " ", @extraargs );
+}
+
 my $destination = pop @ARGV;
-my $source = pop @ARGV;
-unless( $source and $destination ){
+my @sources = @ARGV;
+unless( @sources and $destination ){
     print_usage();
 }
 
-my $verbose = 0;
-my $jobid = "";
-GetOptions(
-    "j|jobid=s"  => \$jobid,
-    "v|verbose"  => \$verbose
-);
-
-my $extraargs = join " ", @ARGV;
-if( $extraargs ){
-    print_warn( $extraargs );
+if( $opts{update} or $opts{checksum} ){
+    $opts{update} = $opts{checksum} ? "checksum" : "size";
 }
 
-unless( $jobid ){
+unless( $opts{jobid} ){
     check_allocation();
 }
 
-run_and_extract($source,$destination,$jobid,$verbose);
+exit broadcast($destination, @sources);
@@ -7,30 +7,272 @@
 ###############################################################
 
 import argparse
-import flux
-import flux.job
-import flux.hostlist
+import pwd
 import sys
 import os
 
+from fluxwrappers import timing
+from fluxwrappers.help import CustomHelpFormatter
 
-class CustomHelpFormatter(argparse.HelpFormatter):
+# The flux bindings are imported where they are used so that --help and -V
+# do not pay for loading them.
+
+
+# job-list attributes needed to filter and prompt for jobs to cancel.
+CANCEL_ATTRS = ["name", "queue", "nodelist"]
+
+# Job state masks for job-manager.raiseall, see flux-core job.h.
+STATE_MASKS = {"pending": 0x0E, "running": 0x30}
+FLUX_USERID_UNKNOWN = 0xFFFFFFFF
+
+
+def bulk_cancel(conn, user, job_states, signal, args):
+    """
+    Cancel, or signal if args.signal is given, all jobs of user in
+    job_states with a single job-manager request, like flux cancel --all.
+
+    Returns a (count, errors) pair, or None if the job-manager does not
+    support bulk requests, user is unknown, or user is not the caller and
+    the caller is not the instance owner, in which case jobs have to be
+    listed and cancelled one at a time. The job-manager only returns
+    counts, so the ids of the jobs are not known.
+    """
+    import errno
+
+    from fluxwrappers.connection import is_owner
+
+    if user == "all":
+        userid = FLUX_USERID_UNKNOWN
+    elif user.isdigit():
+        userid = int(user)
+    else:
+        try:
+            userid = pwd.getpwnam(user).pw_uid
+        except KeyError:
+            return None
+
+    # Only the owner may act on other users' jobs, a guest's request for
+    # them fails as a whole.
+    if userid != os.getuid() and not is_owner(conn):
+        return None
+
+    if args.signal is not None:
+        # killall only signals running jobs.
+        if "running" not in job_states:
+            return None
+        topic = "job-manager.killall"
+        payload = {"dry_run": False, "userid": userid, "signum": signal}
+    else:
+        states = 0
+        for name in job_states:
+            states |= STATE_MASKS[name]
+        topic = "job-manager.raiseall"
+        payload = {
+            "dry_run": False,
+            "userid": userid,
+            "states": states,
+            "severity": 0,
+            "type": "cancel",
+        }
+
+    timer = timing.current()
+    try:
+        with timer.phase("cancel"):
+            response = conn.rpc(topic, payload).get()
+    except OSError as err:
+        if err.errno in (errno.ENOSYS, errno.EPROTO, errno.EPERM):
+            return None
+        raise
+    finally:
+        timer.count("rpcs")
+    return response["count"], response.get("errors", 0)
+
+
+def lookup_jobs(conn, args, user, job_ids, job_states):
+    """
+    Return the jobs in job_ids matching the state, name, partition and
+    nodelist filters, and the user filter if one was given with -u.
+
+    JobList.fetch_jobs() ignores explicit ids, so the jobs are looked up by
+    id and the filters are applied here.
+    """
+    import errno
+
+    import flux.hostlist
+
+    from fluxwrappers import jobids
+    from fluxwrappers.record import JobRecord
+
+    myname = os.path.basename(__file__)
+    timer = timing.current()
+    states = 0
+    for name in job_states:
+        states |= STATE_MASKS[name]
+    hosts = None
+    if args.nodelist is not None:
+        hosts = set(flux.hostlist.Hostlist(args.nodelist))
+    attrs = CANCEL_ATTRS + ["userid", "state"]
+
+    jobs = []
+    with timer.phase("fetch"):
+        for jobid, job, error in jobids.lookup_jobs(conn, job_ids, attrs):
+            if job is None:
+                if isinstance(error, ValueError) or error.errno in (
+                    errno.ENOENT,
+                    errno.EINVAL,
+                ):
+                    if args.verbose:
+                        print(
+                            f"{myname}: error: Kill job error on job id {jobid}: Invalid job id specified",
+                            file=sys.stderr,
+                        )
+                else:
+                    print(
+                        f"{myname}: error: Kill job error on job id {jobid}: {error.strerror}",
+                        file=sys.stderr,
+                    )
+                continue
+            timer.count("rpcs")
+            job = JobRecord(job)
+            if not job.state_id & states:
+                continue
+            if args.user is not None and user != "all":
+                if user not in (job.username, str(job.userid)):
+                    continue
+            if args.name is not None and job.name != args.name:
+                continue
+            if args.partition is not None and job.queue != args.partition:
+                continue
+            if hosts is not None and (
+                not job.nodelist
+                or hosts.isdisjoint(flux.hostlist.Hostlist(job.nodelist))
+            ):
+                continue
+            jobs.append(job)
+    timer.count("jobs", len(jobs))
+    return jobs
+
+
+def fetch_jobs(conn, args, user, job_ids, job_states):
     """
-    Create minimal argparse format to mimic that of Slurm.
+    Return the jobs matching the user, state, name, partition and nodelist
+    filters.
 
-    See https://stackoverflow.com/a/31124505 for original answer to shortening
-    argparse's usage documentation.
+    The name and partition filters are always applied by job-list. The
+    nodelist filter is sent as a hostlist constraint, and is only applied
+    here if the job-list service or the Python bindings do not support it.
+    Explicit job ids are looked up by id, see lookup_jobs().
     """
+    import flux.hostlist
+    import flux.job
+
+    from fluxwrappers.record import records
+
+    timer = timing.current()
+    if job_ids:
+        return lookup_jobs(conn, args, user, job_ids, job_states)
+
+    query = dict(
+        attrs=CANCEL_ATTRS,
+        user=user,
+        filters=job_states,
+        name=args.name,
+        queue=args.partition,
+        max_entries=0,
+    )
 
-    def __init__(self, prog):
-        super().__init__(prog, max_help_position=40, width=80)
+    def list_jobs(**kwargs):
+        with timer.phase("fetch"):
+            rpc = flux.job.JobList(conn, **kwargs).fetch_jobs()
+            rpc.wait_for()
+        timer.count("rpcs")
+        with timer.phase("decode"):
+            jobs = list(records(rpc.get_jobs()))
+        timer.count("jobs", len(jobs))
+        return jobs
 
-    def _format_action_invocation(self, action):
-        if not action.option_strings or action.nargs == 0:
-            return super()._format_action_invocation(action)
-        default = self._get_default_metavar_for_optional(action)
-        args_string = self._format_args(action, default)
-        return ", ".join(action.option_strings) + " " + args_string
+    if args.nodelist is not None:
+        try:
+            return list_jobs(constraint={"hostlist": [args.nodelist]}, **query)
+        except (TypeError, OSError):
+            # Older flux-core without hostlist constraints, filter below.
+            pass
+
+    jobs = list_jobs(**query)
+
+    # Filter so that all jobs are running on a node in args.nodelist.
+    if args.nodelist is not None:
+        with timer.phase("filter"):
+            hosts = set(flux.hostlist.Hostlist(args.nodelist))
+            jobs = [
+                job
+                for job in jobs
+                if job.nodelist
+                and not hosts.isdisjoint(flux.hostlist.Hostlist(job.nodelist))
+            ]
+    return jobs
+
+
+def cancel_jobs(conn, jobs, signal, args):
+    """
+    Cancel or signal jobs asynchronously.
+
+    Up to args.max_inflight requests are kept outstanding and each response
+    is handled as it arrives, at which point the next request is sent. With
+    args.verbose the id of each job is printed once it is cancelled.
+    Returns the number of requests sent.
+    """
+    import flux.job
+
+    myname = os.path.basename(__file__)
+    action = "signaled" if args.signal is not None else "cancelled"
+    pending = iter(jobs)
+    inflight = set()
+    count = 0
+
+    def send_next():
+        nonlocal count
+        job = next(pending, None)
+        if job is None:
+            return False
+        # Send signal if args.signal is present, else default to cancel.
+        if args.signal is not None:
+            future = flux.job.kill_async(conn, job.id, signum=signal)
+        else:
+            future = flux.job.cancel_async(conn, job.id)
+        inflight.add(future)
+        future.then(on_response, job)
+        count += 1
+        return True
+
+    def on_response(future, job):
+        inflight.discard(future)
+        try:
+            future.get()
+            if args.verbose:
+                print(f"{myname}: {action} job {job.f58}", file=sys.stderr)
+        # Print error to user if they don't have permission to cancel a job.
+        except PermissionError:
+            print(
+                f"{myname}: error: Kill job error on job id {job.id}: Access/permission denied",
+                file=sys.stderr,
+            )
+        except FileNotFoundError:
+            if args.verbose:
+                print(
+                    f"{myname}: error: Kill job error on job id {job.id}: Invalid job id specified",
+                    file=sys.stderr,
+                )
+        send_next()
+
+    with timing.current().phase("cancel"):
+        for _ in range(max(args.max_inflight, 1)):
+            if not send_next():
+                break
+        if inflight:
+            conn.reactor_run()
+    timing.current().count("rpcs", count)
+    return count
 
 
 def main(args):
@@ -56,6 +298,14 @@ def main(args):
         print("flux-wrappers 0.0.0")
         exit(0)
 
+    import time
+
+    import flux.hostlist
+    import flux.job
+
+    from fluxwrappers.connection import connect
+    from fluxwrappers.states import SCANCEL_STATES
+
     # Set default signal code.
     signal = 9
 
@@ -80,7 +330,8 @@ def main(args):
             exit(1)
 
     # Initialize connection to flux.
-    conn = flux.Flux()
+    with timing.current().phase("connect"):
+        conn = connect()
 
     # -------------------------------------------------------------------------
     # Configure explicit job_id if given.
@@ -106,12 +357,7 @@ def main(args):
     # Validate given job state.
     if args.state is not None:
         # Load dictionary of known states and their aliases.
-        known_states = {
-            "running": "running",
-            "r": "running",
-            "pending": "pending",
-            "pd": "pending",
-        }
+        known_states = SCANCEL_STATES
         if args.state.lower() in known_states.keys():
             job_states = [known_states[args.state.lower()]]
             job_filters["state"] = ",".join(job_states)
@@ -123,12 +369,12 @@ def main(args):
     # -------------------------------------------------------------------------
     # Configure user for command scope
     # -------------------------------------------------------------------------
-    # By default set the user based on the user executing the command.
-    user = os.getlogin()
-
-    # Overwrite default user if explicitly specified.
+    # By default set the user based on the user executing the command. The
+    # uid is used rather than os.getlogin(), which fails without a terminal.
     if args.user is not None:
         user = args.user
+    else:
+        user = pwd.getpwuid(os.getuid()).pw_name
 
     # Translate root to 'all' scope for flux compatibility.
     if user == "root":
@@ -138,33 +384,48 @@ def main(args):
     job_filters["user"] = user
 
     # -------------------------------------------------------------------------
-    # Query Flux for JobList
+    # Cancel by user and state in one request if possible.
     # -------------------------------------------------------------------------
-    # Retrieve jobs and attributes from flux.
-    rpc = flux.job.JobList(
-        conn, user=user, ids=job_ids, filters=job_states
-    ).fetch_jobs()
-    jobs = list(rpc.get_jobinfos())
+    # Jobs are not listed first, so jobs that start or finish meanwhile are
+    # handled by the job-manager consistently with the filter. Guests acting
+    # on other users' jobs, who the job-manager turns down, list them below.
+    # The job-manager only returns a count, so with -v the jobs are listed
+    # below too, to report the id of each job.
+    if not (
+        job_ids
+        or args.name
+        or args.partition
+        or args.nodelist
+        or args.interactive
+        or args.verbose
+    ):
+        result = bulk_cancel(conn, user, job_states, signal, args)
+        if result is not None:
+            count, errors = result
+            action = "signaled" if args.signal is not None else "cancelled"
+            if errors:
+                print(
+                    f"{myname}: error: {errors} of {count} jobs could not be {action}",
+                    file=sys.stderr,
+                )
+            return
 
     # -------------------------------------------------------------------------
-    # Filter retrived jobs based on job properies and given arguments.
+    # Query Flux for JobList
     # -------------------------------------------------------------------------
-    # Filter so that all jobs are running on a node in args.nodelist if provided.
+    # Add the remaining filters for verbose output. They are all applied by
+    # job-list so only matching jobs are returned.
     if args.nodelist is not None:
-        nodelist = flux.hostlist.Hostlist(args.nodelist)
-        jobs = [job for job in jobs if job.nodelist in nodelist]
-        job_filters["nodelist"] = ",".join(nodelist)
-
-    # Filter so that all jobs have the name args.name if provided.
+        job_filters["nodelist"] = ",".join(flux.hostlist.Hostlist(args.nodelist))
     if args.name is not None:
-        jobs = [job for job in jobs if job.name == args.name]
         job_filters["name"] = args.name
-
-    # Filter so that all jobs are within the partition args.partition if provided.
     if args.partition is not None:
-        jobs = [job for job in jobs if job.sched.queue == args.partition]
         job_filters["partition"] = args.partition
 
+    # Retrieve jobs and attributes from flux. Only the attributes used by the
+    # filters and the interactive prompt below are requested.
+    jobs = fetch_jobs(conn, args, user, job_ids, job_states)
+
     # Catch the case where no jobs made it through the filters and tell the
     # user on verbose output.
     if args.verbose and len(jobs) < 1:
@@ -181,45 +442,48 @@ def main(args):
         )
 
     # -------------------------------------------------------------------------
-    # Cancel filtered jobs.
+    # Confirm jobs to cancel if interactive.
     # -------------------------------------------------------------------------
-    for job in jobs:
-        # If interactive prompt for confirmation before cancelling any jobs.
-        if args.interactive:
+    # If interactive prompt for confirmation before cancelling any jobs.
+    if args.interactive:
+        confirmed = []
+        for job in jobs:
             answer = ""
             while answer not in ["y", "n"]:
                 print(
-                    f"Cancel job_id={job.id.f58} name={job.name} partition={job.sched.queue} [y/n]?",
+                    f"Cancel job_id={job.f58} name={job.name} partition={job.queue} [y/n]?",
                     end=" ",
                 )
                 answer = input().lower()
-            if answer == "n":
-                continue
+            if answer == "y":
+                confirmed.append(job)
+        jobs = confirmed
 
-        try:
-            # Send signal if args.signal is present, else default to cancel.
-            if args.signal is not None:
-                # Send signal to flux job.
-                flux.job.kill(conn, job.id, signum=signal)
-            else:
-                # Cancel a running job in flux.
-                flux.job.cancel(conn, job.id)
+    # -------------------------------------------------------------------------
+    # Cancel filtered jobs.
+    # -------------------------------------------------------------------------
+    start = time.time()
+    count = cancel_jobs(conn, jobs, signal, args)
+    elapsed = time.time() - start
 
-        # Print error to user if they don't have permission to cancel a job.
-        except PermissionError:
-            print(
-                f"{myname}: error: Kill job error on job id {job.id}: Access/permission denied",
-                file=sys.stderr,
-            )
-        except FileNotFoundError:
-            if args.verbose:
-                print(
-                    f"{myname}: error: Kill job error on job id {job.id}: Invalid job id specified",
-                    file=sys.stderr,
-                )
+    # Report throughput on verbose output.
+    if args.verbose and count > 0:
+        action = "signaled" if args.signal is not None else "cancelled"
+        print(
+            f"{myname}: {action} {count} jobs in {elapsed:.3f}s "
+            f"({count / max(elapsed, 1e-6):.1f} jobs/s)",
+            file=sys.stderr,
+        )
 
 
 if __name__ == "__main__":
+    from fluxwrappers import server
+
+    # Run in the resident server if there is one, see fluxwrappers/server.py.
+    status = server.forward(__file__, sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
     fmt = lambda prog: CustomHelpFormatter(prog)
     parser = argparse.ArgumentParser(
         description="scancel like wrapper for Flux.", formatter_class=fmt
@@ -249,6 +513,13 @@ if __name__ == "__main__":
         action="store_true",
         help="require response from user for each job",
     )
+    parser.add_argument(
+        "--max-inflight",
+        metavar="<count>",
+        type=int,
+        default=128,
+        help="maximum number of outstanding cancel requests",
+    )
     parser.add_argument(
         "-n", "--name", metavar="<job_name>", help="act only on jobs with this name"
     )
@@ -282,6 +553,16 @@ if __name__ == "__main__":
     parser.add_argument(
         "-t", "--state", metavar="<state>", help="act only on jobs in this state"
     )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="report where the time was spent on stderr",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="<file>",
+        help="write cProfile statistics to file",
+    )
     parser.add_argument(
         "-u",
         "--user",
@@ -295,7 +576,10 @@ if __name__ == "__main__":
         help="output version information and exit",
     )
     parser.add_argument(
-        "-v", "--verbose", action="store_true", help="show verbose output"
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="show verbose output, including the id of each job cancelled",
     )
     parser.add_argument(
         "-w",
@@ -309,4 +593,7 @@ if __name__ == "__main__":
 
     # Parse arguments and begin execution.
     args = parser.parse_args()
-    main(args)
+    with timing.Timer.from_environment(
+        os.path.basename(__file__), args.timing, args.cprofile
+    ):
+        main(args)
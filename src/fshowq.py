@@ -6,10 +6,19 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 
-import argparse,time
+import argparse,sys,time
 import os.path
-import flux
-import flux.job as fjob
+from fluxwrappers import timing
+
+# flux and the other modules used to list jobs are imported in the functions
+# that use them so that --help does not pay for loading them.
+
+# job-list attributes used by printonejob() and bucket_jobs()
+SHOWQ_ATTRS = [
+    "userid", "state", "result", "ntasks", "duration",
+    "t_submit", "t_run", "t_cleanup",
+    "exception_occurred", "exception_severity", "exception_type",
+]
 
 def print_argwarn(argval) :
     '''
@@ -85,7 +94,7 @@ def printonejob(j,jstate) :
         timestring = parse_date(j.t_cleanup)
         exceptstring = parse_exception(j.exception)
         nastring = " NA         NA        NA         NA        "
-        print(f"{j.id.f58:<10} {j.username:<9} {nastring} {j.status:<12} {exceptstring:>5} {j.ntasks:>6} {remstring:>12}  {timestring}")
+        print(f"{j.f58:<10} {j.username:<9} {nastring} {j.status:<12} {exceptstring:>5} {j.ntasks:>6} {remstring:>12}  {timestring}")
     else :
         if jstate == "active" :
             remstring = parse_time(j.contextual_time)
@@ -93,7 +102,7 @@ def printonejob(j,jstate) :
         else :
             remstring = parse_time(j.contextual_time)
             timestring = parse_date(j.t_submit)
-        print(f"{j.id.f58:<10} {j.username:<9}  {j.status:<9}   {j.ntasks:>6}    {remstring:>9}  {timestring}")
+        print(f"{j.f58:<10} {j.username:<9}  {j.status:<9}   {j.ntasks:>6}    {remstring:>9}  {timestring}")
 
 def printfooter(nj,jstate) :
     '''
@@ -105,64 +114,278 @@ def printfooter(nj,jstate) :
 
 def printjobs(jlist,jstate,noheader=False) :
     '''
-    print a list of jobs with a header and footer
+    print a list, or any iterable, of jobs with a header and footer and
+    return the number of jobs printed
     '''
     if noheader == False :
         printheader(jstate)
-    for j in jlist :
-        printonejob(j,jstate)
+    nj = 0
+    # formatting and printing are timed together as "write"
+    with timing.current().phase("write") :
+        for j in jlist :
+            printonejob(j,jstate)
+            nj += 1
     if noheader == False :
         print()
-        printfooter(len(jlist),jstate)
+        printfooter(nj,jstate)
+    return nj
+
+def bucket_jobs(jobs) :
+    '''
+    sort jobs into completed, eligible, active and blocked lists in one pass
+    '''
+    buckets = {"I": [], "P": [], "R": [], "D": []}
+    bucketof = {"I": "I", "P": "P", "S": "P", "R": "R", "C": "R", "D": "D"}
+    for j in jobs :
+        key = bucketof.get(j.state_single)
+        if key != None :
+            buckets[key].append(j)
+    return buckets
+
+def parse_since(since) :
+    '''
+    turn --since into seconds since the epoch: a duration ago like 30m, 2h
+    or 1d, a date like 2024-05-01 or 2024-05-01T08:00, or epoch seconds
+    '''
+    import datetime,re
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    match = re.fullmatch(r"-?([0-9.]+)([smhd])", since)
+    if match != None :
+        return time.time() - float(match.group(1)) * units[match.group(2)]
+    try :
+        return float(since)
+    except ValueError :
+        return datetime.datetime.fromisoformat(since).timestamp()
+
+def list_jobs(query, cache=None, myhandle=None) :
+    '''
+    get the job dictionaries for one job-list query, from the on-node cache
+    if one is given and recent, and the handle used (connected on demand)
+    '''
+    import flux.job as fjob
+    from fluxwrappers.connection import connect
+    timer = timing.current()
+    jobs = None
+    if cache != None :
+        with timer.phase("cache") :
+            jobs = cache.get(query)
+    if jobs == None :
+        if myhandle == None :
+            with timer.phase("connect") :
+                myhandle = connect()
+        with timer.phase("fetch") :
+            rpc = fjob.JobList(myhandle,**query).fetch_jobs()
+            rpc.wait_for()
+        timer.count("rpcs")
+        with timer.phase("decode") :
+            jobs = rpc.get_jobs()
+        if cache != None :
+            with timer.phase("cache") :
+                cache.put(query, jobs)
+    timer.count("jobs", len(jobs))
+    return jobs, myhandle
+
+def fetch_jobs(user, filters, nocache=False, attrs=SHOWQ_ATTRS) :
+    '''
+    get the job list, from the on-node cache if it is enabled and recent
+    '''
+    from fluxwrappers.cache import JobCache
+    from fluxwrappers.record import records
+    cache = None
+    if not nocache :
+        cache = JobCache.from_environment()
+    query = dict(attrs=attrs, user=user, filters=filters, max_entries=0)
+    jobs, myhandle = list_jobs(query, cache)
+    with timing.current().phase("decode") :
+        return list(records(jobs))
+
+def completed_jobs(user, attrs, since=0.0, max_count=None, page_size=1000, nocache=False) :
+    '''
+    yield completed jobs, most recently completed first, fetched page_size
+    jobs at a time so that only one page is held in memory
+
+    job-list returns inactive jobs by completion time, so each page after
+    the first asks for the jobs that completed no later than the last job
+    of the previous page, skipping the jobs already seen at that time.
+    '''
+    import itertools
+    from fluxwrappers.cache import JobCache
+    from fluxwrappers.record import records
+    if "t_inactive" not in attrs :
+        attrs = attrs + ["t_inactive"]
+    cache = None
+    if not nocache :
+        cache = JobCache.from_environment()
+    myhandle = None
+    before = None
+    seen = set()
+    count = 0
+    while max_count == None or count < max_count :
+        size = page_size
+        if max_count != None :
+            size = min(page_size, max_count - count)
+        query = dict(attrs=attrs, user=user, filters=["inactive"], since=since, max_entries=size + len(seen))
+        if before != None :
+            query["constraint"] = {"t_inactive": [f"<={before!r}"]}
+        try :
+            jobs, myhandle = list_jobs(query, cache, myhandle)
+        except (TypeError, OSError) :
+            if before == None :
+                raise
+            # job-list without constraints, get the rest in one response
+            # and skip the jobs already printed
+            del query["constraint"]
+            query["max_entries"] = 0 if max_count == None else max_count
+            jobs, myhandle = list_jobs(query, cache, myhandle)
+            for j in itertools.islice(records(jobs), count, None) :
+                yield j
+            return
+        full = len(jobs) >= query["max_entries"]
+        page = [j for j in records(jobs) if j.id not in seen][:size]
+        for j in page :
+            yield j
+        count += len(page)
+        if not full or not page :
+            return
+        last = page[-1].t_inactive
+        if last != before :
+            seen = set()
+        before = last
+        seen.update(j.id for j in page if j.t_inactive == last)
+        # show this page while the next one is fetched
+        sys.stdout.flush()
 
 def main(parsedargs) :
+    from fluxwrappers.connection import connect
+    from fluxwrappers.jobids import lookup_jobs, read_ids
+    from fluxwrappers import output
+    from fluxwrappers.record import JobRecord
     args, unknown_args = parsedargs
+    timer = timing.current()
     if unknown_args  :
         print_argwarn(" ".join(unknown_args))
+    # machine readable output needs the attributes of its fields as well
+    attrs = SHOWQ_ATTRS
+    if args.output != None :
+        try :
+            fields = output.parse_fields(args.fields)
+        except ValueError as err :
+            print(f"ERROR: unknown output field {err}, valid fields are: {','.join(output.FIELDS)}")
+            exit(1)
+        attrs = SHOWQ_ATTRS + [a for a in output.get_attrs(fields) if a not in SHOWQ_ATTRS]
     if args.user != None :
         user = args.user
     else :
         user = "all"
-    # get job list and sort it
-    myhandle = flux.Flux()
+    # only ask job-list for the states we are going to print
+    if args.c :
+        filters = ["inactive"]
+    elif args.b :
+        filters = ["depend"]
+    elif args.i :
+        filters = ["priority", "sched"]
+    elif args.r :
+        filters = ["run", "cleanup"]
+    else :
+        filters = ["active"]
+    # completed jobs are printed page by page as they are fetched
+    if args.c and args.jobid == None :
+        try :
+            since = parse_since(args.since) if args.since != None else 0.0
+        except ValueError :
+            print(f"ERROR: invalid --since time {args.since}")
+            exit(1)
+        jobs = completed_jobs(user, attrs, since, args.max_count, max(args.page_size, 1), args.no_cache)
+        if args.output != None :
+            lines = output.job_lines(args.output, jobs, fields, not args.noheader)
+            with timer.phase("write") :
+                output.write_lines(lines)
+            return
+        njobs = printjobs(jobs, "completed", args.noheader)
+        if args.noheader == False :
+            print(f"Total jobs: {njobs:>3}")
+            print()
+        return
+    # get job list once and sort it into buckets in a single pass
     if args.jobid == None :
-        mylist = fjob.JobList(myhandle,user=user)
+        jobs = fetch_jobs(user, filters, args.no_cache, attrs)
     else :
-        decid = fjob.id_parse(args.jobid)
-        mylist = fjob.JobList(myhandle,user=user,ids=[decid])
-    donejobs = [j for j in mylist.jobs() if j.state_single == "I"]
-    pendjobs = [j for j in mylist.jobs() if j.state_single in {"P", "S"}]
-    runjobs = [j for j in mylist.jobs() if j.state_single in {"R", "C"}]
-    blockedjobs = [j for j in mylist.jobs() if j.state_single == "D"]
+        with timer.phase("connect") :
+            myhandle = connect()
+        # many ids are looked up a window at a time, unknown ids are skipped
+        jobs = []
+        with timer.phase("fetch") :
+            for jobid, job, error in lookup_jobs(myhandle, read_ids(args.jobid), attrs) :
+                if job != None :
+                    jobs.append(JobRecord(job))
+                    timer.count("rpcs")
+        # the state filter is applied by the buckets printed below
+        if user != "all" :
+            jobs = [j for j in jobs if user in (j.username, str(j.userid))]
+        timer.count("jobs", len(jobs))
+    with timer.phase("filter") :
+        buckets = bucket_jobs(jobs)
+    donejobs = buckets["I"]
+    pendjobs = buckets["P"]
+    runjobs = buckets["R"]
+    blockedjobs = buckets["D"]
+    if args.output != None :
+        if args.c :
+            jlist = donejobs
+        elif args.b :
+            jlist = blockedjobs
+        elif args.i :
+            jlist = pendjobs
+        elif args.r :
+            jlist = runjobs
+        else :
+            jlist = runjobs + pendjobs + blockedjobs
+        lines = output.job_lines(args.output, jlist, fields, not args.noheader)
+        with timer.phase("write") :
+            output.write_lines(lines)
+        return
     if args.c :
-        printjobs(donejobs, "completed", args.noheader)
-        njobs = len(donejobs)
+        njobs = printjobs(donejobs, "completed", args.noheader)
     elif args.b :
-        printjobs(blockedjobs, "blocked", args.noheader)
-        njobs = len(blockedjobs)
+        njobs = printjobs(blockedjobs, "blocked", args.noheader)
     elif args.i :
-        printjobs(pendjobs, "eligible", args.noheader)
-        njobs = len(pendjobs)
+        njobs = printjobs(pendjobs, "eligible", args.noheader)
     elif args.r :
-        printjobs(runjobs, "active", args.noheader)
-        njobs = len(runjobs)
+        njobs = printjobs(runjobs, "active", args.noheader)
     else :
-        printjobs(runjobs, "active", args.noheader)
-        printjobs(pendjobs, "eligible", args.noheader)
-        printjobs(blockedjobs, "blocked", args.noheader)
-        njobs = len(runjobs) + len(pendjobs) + len(blockedjobs)
+        njobs = printjobs(runjobs, "active", args.noheader)
+        njobs += printjobs(pendjobs, "eligible", args.noheader)
+        njobs += printjobs(blockedjobs, "blocked", args.noheader)
     if args.noheader == False :
         print(f"Total jobs: {njobs:>3}")
         print()
 
 if __name__ == '__main__' :
+    from fluxwrappers import server
+    # run in the resident server if there is one, see fluxwrappers/server.py
+    status = server.forward(__file__, sys.argv[1:])
+    if status != None :
+        sys.exit(status)
     parser = argparse.ArgumentParser(description="List running and queued jobs in squeue format.", conflict_handler='resolve', allow_abbrev=False)
     parser.add_argument('-H', '--noheader', action='store_true', help='do not print a header')
     parser.add_argument('-u', '--user', metavar='<user>', help='show jobs run by user')
-    parser.add_argument('-j', '--jobid', metavar='<jobid>', help='show only job with jobid')
+    parser.add_argument('-j', '--jobid', metavar='<jobid>,...', help='show only the jobs with these ids, @file reads ids from file and - from stdin')
+    parser.add_argument('--no-cache', action='store_true', help='always query flux, even if a cached job list is available')
     exclarg = parser.add_mutually_exclusive_group()
     exclarg.add_argument('-c', action='store_true', help='display only completed jobs')
     exclarg.add_argument('-b', action='store_true', help='display only blocked jobs')
     exclarg.add_argument('-i', action='store_true', help='display only eligible jobs')
     exclarg.add_argument('-r', action='store_true', help='display only running jobs')
-    main(parser.parse_known_args())
+    parser.add_argument('--since', metavar='<time>', help='with -c, only show jobs completed since time, e.g. 2h, 1d or 2024-05-01T08:00')
+    parser.add_argument('--max-count', metavar='<count>', type=int, help='with -c, show at most count jobs')
+    parser.add_argument('--page-size', metavar='<count>', type=int, default=1000, help='with -c, fetch and print count jobs at a time')
+    outarg = parser.add_mutually_exclusive_group()
+    outarg.add_argument('--json', action='store_const', dest='output', const='json', help='write jobs as a JSON document')
+    outarg.add_argument('--ndjson', action='store_const', dest='output', const='ndjson', help='write one JSON object per job and line')
+    outarg.add_argument('--csv', action='store_const', dest='output', const='csv', help='write jobs as comma separated values')
+    parser.add_argument('--fields', metavar='<field>,<field>,...', help='fields written by --json, --ndjson and --csv (default: all)')
+    parser.add_argument('--timing', action='store_true', help='report where the time was spent on stderr')
+    parser.add_argument('--cprofile', metavar='<file>', help='write cProfile statistics to file')
+    parsedargs = parser.parse_known_args()
+    with timing.Timer.from_environment(os.path.basename(__file__), parsedargs[0].timing, parsedargs[0].cprofile) :
+        main(parsedargs)
@@ -0,0 +1,216 @@
+#!/bin/env -S flux python
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. NOTICE.LLNS)
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+import argparse
+import os.path
+import sys
+
+from fluxwrappers import timing
+from fluxwrappers.help import CustomHelpFormatter
+
+# The flux bindings and most other modules are imported where they are used
+# so that --help and argument errors do not pay for loading them.
+
+DEFAULT_FORMAT = "%9P %.5a %.10l %.6D %.6t %N"
+NODE_FORMAT = "%{width}N %.6D %9P %.6t"
+REASON_FORMAT = "%20E %9u %19H %N"
+
+
+def disclaimer():
+    """
+    print a warning for unsupported arguments
+    """
+    myname = os.path.basename(__file__)
+    return (
+        f'{myname}: hint: {myname} is a wrapper script for the native "flux resource" command.\n'
+        f'{myname}: hint: See "man flux resource" for help using the native commands.'
+    )
+
+
+def main(parsedargs):
+    import itertools
+    import logging
+
+    from fluxwrappers import resources
+    from fluxwrappers.connection import connect
+    from fluxwrappers.format import SinfoFormatter
+    from fluxwrappers.output import write_lines
+
+    args, unknown_args = parsedargs
+    myname = os.path.basename(__file__)
+    timer = timing.current()
+    logging.basicConfig(level=args.loglevel, format="%(message)s")
+    if unknown_args:
+        logging.warning(
+            f'{myname}: warning: "{unknown_args}" is not supported by this wrapper and is being ignored.\n'
+        )
+        logging.warning(disclaimer())
+    else:
+        logging.debug(disclaimer())
+
+    partitions = None
+    if args.partition is not None:
+        partitions = set(args.partition.split(","))
+    states = None
+    if args.states is not None:
+        states = {state.strip().lower() for state in args.states.split(",")}
+        unknown = states - set(resources.STATE_NAMES) - set(
+            resources.STATE_NAMES.values()
+        )
+        if unknown:
+            logging.error(
+                f"{myname}: error: Invalid node state specified: {','.join(unknown)}"
+            )
+            exit(1)
+
+    if args.format is not None:
+        format_string = args.format
+    elif args.list_reasons:
+        format_string = REASON_FORMAT
+    else:
+        format_string = DEFAULT_FORMAT
+    formatter = SinfoFormatter()
+    for token in formatter.get_unknown_tokens(format_string):
+        logging.error(f"{myname}: error: Invalid node format specification: {token}")
+
+    # The configuration, scheduler and resource requests are sent at once on
+    # one handle, instead of running flux queue list, flux queue status and
+    # flux resource list one after another.
+    with timer.phase("connect"):
+        conn = connect()
+    logging.info(
+        f"{myname}: requesting config.get, sched.resource-status, resource.status"
+        " and job-manager.queue-status"
+    )
+    with timer.phase("fetch"):
+        try:
+            res = resources.fetch(conn)
+        except OSError as err:
+            logging.error(f"{myname}: error: cannot get resource status: {err}")
+            exit(1)
+
+    # Node names are not truncated in the default -N format.
+    if args.Node and args.format is None and not args.list_reasons:
+        width = max(len("NODELIST"), res.hosts.max_length())
+        format_string = NODE_FORMAT.format(width=width)
+    plan = formatter.compile(format_string)
+
+    with timer.phase("filter"):
+        if args.list_reasons:
+            groups = resources.drain_groups(res)
+        elif args.Node:
+            groups = resources.node_groups(res, partitions)
+        else:
+            # Like sinfo, drained nodes are split by reason if it is shown.
+            by_reason = any(token in format_string for token in ("%E", "%u", "%H"))
+            groups = resources.partition_groups(res, partitions, by_reason)
+        if states is not None:
+            groups = (
+                group
+                for group in groups
+                if group.state in states
+                or resources.STATE_NAMES[group.state] in states
+            )
+
+    lines = timer.wrap(
+        "format", (formatter.render_job(plan, group) for group in groups), count="rows"
+    )
+    if not args.noheader:
+        header = formatter.render(plan, formatter.get_header_dict())
+        lines = itertools.chain([header], lines)
+    try:
+        with timer.phase("write"):
+            write_lines(lines)
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
+if __name__ == "__main__":
+    from fluxwrappers import server
+
+    # Run in the resident server if there is one, see fluxwrappers/server.py.
+    status = server.forward(__file__, sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
+    def fmt(prog):
+        return CustomHelpFormatter(prog)
+
+    parser = argparse.ArgumentParser(
+        description="Display information about nodes and partitions in sinfo format.",
+        conflict_handler="resolve",
+        allow_abbrev=False,
+        formatter_class=fmt,
+    )
+
+    parser.add_argument(
+        "-h", "--noheader", action="store_true", help="do not print a header"
+    )
+
+    parser.add_argument(
+        "-N",
+        "--Node",
+        action="store_true",
+        help="print one line per node and partition",
+    )
+
+    parser.add_argument(
+        "-R",
+        "--list-reasons",
+        action="store_true",
+        help="list the reasons nodes are drained",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--format",
+        metavar="<format>",
+        help=f'format specification (default: "{DEFAULT_FORMAT.replace("%", "%%")}")',
+    )
+
+    parser.add_argument(
+        "-p",
+        "--partition",
+        metavar="<partition>,...",
+        help="display only nodes in the given partitions/queues",
+    )
+
+    parser.add_argument(
+        "-t",
+        "--states",
+        metavar="<state>,...",
+        help="display only nodes in the given states, e.g. idle,mix",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="report details of script actions",
+        action="store_const",
+        dest="loglevel",
+        const="INFO",
+    )
+
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="report where the time was spent on stderr",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        metavar="<file>",
+        help="write cProfile statistics to file",
+    )
+
+    parsedargs = parser.parse_known_args()
+    with timing.Timer.from_environment(
+        os.path.basename(__file__), parsedargs[0].timing, parsedargs[0].cprofile
+    ):
+        main(parsedargs)
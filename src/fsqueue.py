@@ -7,195 +7,312 @@
 ###############################################################
 
 import argparse
-import datetime
-import flux
-import flux.hostlist
-import flux.job
-import logging
 import os.path
-import re
-import time
+import sys
 
+from fluxwrappers import timing
+from fluxwrappers.help import CustomHelpFormatter
+
+# The flux bindings and most other modules are imported where they are used
+# so that --help and argument errors do not pay for loading them.
 
-class CustomHelpFormatter(argparse.HelpFormatter):
-    """
-    Create minimal argparse format to mimic that of Slurm.
 
-    See https://stackoverflow.com/a/31124505 for original answer to shortening
-    argparse's usage documentation.
+def disclaimer():
     """
+    print a warning for unsupported arguments
+    """
+    myname = os.path.basename(__file__)
+    return (
+        f'{myname}: hint: {myname} is a wrapper script for the native "flux jobs" command.\n'
+        f'{myname}: hint: See "man flux jobs" for help using the native commands.'
+    )
 
-    def __init__(self, prog):
-        super().__init__(prog, max_help_position=40, width=80)
-
-    def _format_action_invocation(self, action):
-        if not action.option_strings or action.nargs == 0:
-            return super()._format_action_invocation(action)
-        default = self._get_default_metavar_for_optional(action)
-        args_string = self._format_args(action, default)
-        return ", ".join(action.option_strings) + " " + args_string
-
-
-class SlurmFormatter:
-    """ """
-
-    token_re = r"%\.?[0-9]*[^%\s]?"
-    token_pad_re = r"\.*[0-9]+"
-
-    @staticmethod
-    def parse_time(time):
-        """
-        turn a bunch of seconds into something human readable
-        """
-        time = int(time)
-
-        # Convert time into hours, minutes, and seconds.
-        days = time // 86400
-        hours = time // 3600 % 24
-        minutes = time // 60 % 60
-        seconds = time % 60
-
-        if days > 0:
-            return f"{days}-{hours:02}:{minutes:02}:{seconds:02}"
-
-        if hours > 0:
-            return f"{hours}:{minutes:02}:{seconds:02}"
-
-        return f"{minutes:02}:{seconds:02}"
-
-    def get_header_dict(self):
-        """
-        print header for output
-        """
-        headers = {
-            "%": "",
-            "%a": "USERNAME",
-            "%i": "JOBID",
-            "%P": "PARTITION",
-            "%j": "NAME",
-            "%u": "USER",
-            "%t": "STATUS",
-            "%M": "TIME",
-            "%D": "NODES",
-            "%R": "NODELIST(REASON)",
-        }
+def filter_byhostlist(jobs, jobfilter):
+    """
+    filter out jobs that did not run on hosts in jobfilter
+    """
+    # Expand the requested hosts into a set once and each job's nodelist
+    # once, so the cost grows with the total nodelist size rather than
+    # jobs x hosts. Each matching job is kept once.
+    import flux.hostlist
 
-        return headers
-
-    def get_job_dict(self, job):
-        """
-        Print a row based on the information from a job and format_string.
-        """
-        reasonnode = job.sched.reason_pending
-        if str(job.sched.reason_pending) == "":
-            reasonnode = job.nodelist
-
-        values = {
-            "%": "",
-            "%a": job.username,
-            "%i": job.id.f58,
-            "%P": job.queue,
-            "%j": job.name,
-            "%u": job.username,
-            "%t": job.status_abbrev,
-            "%M": self.parse_time(job.runtime),
-            "%D": job.nnodes,
-            "%R": reasonnode,
-        }
+    # Jobs are yielded as they are matched so output can start early.
+    hosts = set(jobfilter)
+    for j in jobs:
+        if not j.nodelist:
+            continue
+        if not hosts.isdisjoint(flux.hostlist.Hostlist(j.nodelist)):
+            yield j
 
-        return values
 
-    def format(self, format_string, types_dict):
-        """
-        format output to minimc slurm's format language
-        """
-        result = []
-        prev_end = 0
+def lookup_byid(conn, ids, attrs):
+    """
+    yield a JobRecord for each distinct job in ids, an iterable of job id
+    strings, in the order given, reporting the ids that cannot be looked up
+    """
+    import errno
+    import logging
 
-        # Search for tokens that begin with % in the format string.
-        for token in re.finditer(self.token_re, format_string):
+    from fluxwrappers.jobids import lookup_jobs
+    from fluxwrappers.record import JobRecord
 
-            # Copy text in string before format token to the result text.
-            prefix = format_string[prev_end : token.start()]
+    myname = os.path.basename(__file__)
+    timer = timing.current()
+    for jobid, job, error in lookup_jobs(conn, ids, attrs):
+        if job is not None:
+            timer.count("rpcs")
+            yield JobRecord(job)
+        elif isinstance(error, ValueError) or error.errno in (
+            errno.ENOENT,
+            errno.EINVAL,
+        ):
+            logging.error(f"{myname}: error: Invalid job id specified: {jobid}")
+        else:
+            logging.error(f"{myname}: error: {jobid}: {error.strerror}")
 
-            # To match the behavior of squeue's format option we should
-            # ignore unknown tokens and print them as regular text after
-            # issuing a warning.
-            try:
-                # Users may specify padding modifiers before tokens in
-                # the form of %.10u or %10u to indicate a prefix or suffix
-                # padding respectively. Find and extract padding modifiers
-                # if present.
-                width_match = re.match(self.token_pad_re, token.group()[1:])
-                if width_match is not None:
-                    width_string = width_match.group()
-                    output = types_dict[token.group().replace(width_string, "")]
-                    if width_string[0] == ".":
-                        width = int(width_string[1:])
-                        output = f"{output:>{width}}"[:width]
-                    else:
-                        width = int(width_string)
-                        output = f"{output:<{width}}"[:width]
-                else:
-                    output = types_dict[token.group()]
-
-                result.append(prefix)
-                result.append(output)
-                prev_end = token.end()
-
-            except KeyError:
-                continue
 
-        # Add the remainder of format string after last token to result.
-        result.append(format_string[prev_end:])
-        return "".join(result)
-
-    def get_unknown_tokens(self, format_string):
-        """
-        Return a list of unknown tokens based on the types_dict given.
-        """
-        headers = self.get_header_dict()
-        unknown_tokens = []
-        for token in re.finditer(self.token_re, format_string):
-            width_match = re.match(self.token_pad_re, token.group()[1:])
-            key = token.group()
-            try:
-                if width_match is not None:
-                    width_string = width_match.group()
-                    key = key.replace(width_string, "")
-                    headers[key]
-                else:
-                    headers[key]
-            except KeyError:
-                unknown_tokens.append(key)
-        return unknown_tokens
+def make_job_filter(user, job_states, job_ids, queue, job_name, nodelist):
+    """
+    Return a function telling whether a job matches the filters that are
+    otherwise applied by the JobList query and filter_byhostlist().
+    """
+    import flux.hostlist
 
+    from fluxwrappers.states import RESULT_FILTERS, STATE_FILTERS
 
-def disclaimer():
+    states = set()
+    results = set()
+    for name in ",".join(job_states).split(","):
+        if name in RESULT_FILTERS:
+            results.add(name.upper())
+        else:
+            states.update(STATE_FILTERS.get(name, ()))
+    ids = set(job_ids)
+    hosts = set(flux.hostlist.Hostlist(nodelist)) if nodelist is not None else None
+
+    def job_filter(job):
+        if ids and job.id not in ids:
+            return False
+        if user != "all" and user not in (job.username, str(job.userid)):
+            return False
+        if job.state not in states and not (
+            job.state == "INACTIVE" and job.result in results
+        ):
+            return False
+        if queue and job.queue != queue:
+            return False
+        if job_name and job.name != job_name:
+            return False
+        if hosts is not None and (
+            not job.nodelist
+            or hosts.isdisjoint(flux.hostlist.Hostlist(job.nodelist))
+        ):
+            return False
+        return True
+
+    return job_filter
+
+
+def print_jobs(
+    formatter, plan, jobs, noheader, first_line=None, output=None, instances=False
+):
     """
-    print a warning for unsupported arguments
+    print the squeue table for jobs, optionally preceded by first_line, or
+    if output is a (mode, fields) pair, print the fields of jobs in that
+    machine readable mode
+
+    If instances is set the table starts with an INSTANCE column giving the
+    instance each job was listed from, "-" for the enclosing instance.
     """
-    myname = os.path.basename(__file__)
-    return (
-        f'{myname}: hint: {myname} is a wrapper script for the native "flux jobs" command.\n'
-        f'{myname}: hint: See "man flux jobs" for help using the native commands.'
+    import itertools
+
+    from fluxwrappers.output import job_lines, write_lines
+
+    timer = timing.current()
+    if output is not None:
+        mode, fields = output
+        jobs = timer.wrap("format", jobs, count="rows")
+        lines = timer.wrap("format", job_lines(mode, jobs, fields, not noheader))
+        with timer.phase("write"):
+            write_lines(lines)
+        return
+
+    formatter.set_time()
+    if instances:
+        # The column is as wide as the longest instance path.
+        jobs = list(jobs)
+        width = max([len("INSTANCE")] + [len(job.instance) for job in jobs])
+    lines = timer.wrap(
+        "format", (formatter.render_job(plan, job) for job in jobs), count="rows"
     )
+    header = None
+    if noheader is False:
+        header = formatter.render(plan, formatter.get_header_dict())
+    if instances:
+        names = (f"{job.instance or '-':<{width}} " for job in jobs)
+        lines = map(str.__add__, names, lines)
+        if header is not None:
+            header = f"{'INSTANCE':<{width}} {header}"
+    if header is not None:
+        lines = itertools.chain([header], lines)
+    if first_line is not None:
+        lines = itertools.chain([first_line], lines)
+    with timer.phase("write"):
+        write_lines(lines)
+
+
+def iterate(
+    conn,
+    args,
+    formatter,
+    plan,
+    joblist,
+    user,
+    job_ids,
+    attrs,
+    job_filter,
+    sort_keys=None,
+    output=None,
+):
+    """
+    Reprint the table every args.iterate seconds until interrupted.
+
+    The table is listed once, then kept up to date from the job manager
+    journal: only jobs with new events since the last redraw are looked up
+    again. The journal only has other users' jobs for the instance owner,
+    so it is used only if the caller is the owner or lists their own jobs.
+    Otherwise, or if the journal is not available, the table is listed again
+    on the same handle each iteration. Jobs given by id are looked up by id
+    rather than listed.
+    """
+    import datetime
+    import itertools
+    import time
+
+    import flux.job
+
+    from fluxwrappers.connection import is_caller, is_owner
+    from fluxwrappers.record import records
+    from fluxwrappers.table import JobTable
+
+    consumer = None
+    if is_caller(user) or is_owner(conn):
+        try:
+            consumer = flux.job.JournalConsumer(conn, since=time.time())
+            consumer.start()
+        except (AttributeError, OSError):
+            consumer = None
+
+    if job_ids:
+        table = {
+            job.id: job
+            for job in lookup_byid(conn, job_ids, attrs)
+            if job_filter(job)
+        }
+    else:
+        table = {
+            job.id: job
+            for job in records(joblist.fetch_jobs().get_jobs())
+            if job_filter(job)
+        }
+    tracked = set(job_ids) if job_ids else None
+
+    while True:
+        now = datetime.datetime.now().strftime("%a %b %d %H:%M:%S %Y")
+        jobs = table.values()
+        if sort_keys:
+            jobs = JobTable(jobs, JobTable.sort_columns(sort_keys)).sorted(sort_keys)
+        if args.max_count is not None:
+            jobs = itertools.islice(jobs, args.max_count)
+        if output is not None:
+            now = None
+        print_jobs(formatter, plan, jobs, args.noheader, now, output)
+
+        deadline = time.time() + args.iterate
+        if consumer is None:
+            time.sleep(args.iterate)
+            if job_ids:
+                table = {}
+                update_jobs(conn, table, job_ids, attrs, job_filter)
+            else:
+                table = {
+                    job.id: job
+                    for job in records(joblist.fetch_jobs().get_jobs())
+                    if job_filter(job)
+                }
+            continue
+
+        # Collect the ids of jobs with new events until the next redraw.
+        changed = set()
+        while True:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                event = consumer.poll(timeout=timeout)
+            except TimeoutError:
+                break
+            if event is None:
+                # The journal has ended, fall back to listing.
+                consumer = None
+                break
+            if tracked is None or event.jobid in tracked:
+                changed.add(event.jobid)
 
-def filter_byhostlist(jobs, jobfilter):
+        update_jobs(conn, table, changed, attrs, job_filter)
+
+
+def update_jobs(conn, table, jobids, attrs, job_filter, window=256):
     """
-    filter out jobs that did not run on hosts in jobfilter
+    Look up jobids and update table in place, dropping jobs that no longer
+    match job_filter. At most window lookups are outstanding at once.
     """
-    filtered_jobs = []
-    for j in jobs:
-        for h in jobfilter:
-            if h in flux.hostlist.Hostlist(j.nodelist):
-                filtered_jobs.append(j)
-    return filtered_jobs
+    import flux.job
+
+    from fluxwrappers.record import JobRecord
+
+    timer = timing.current()
+    jobids = list(jobids)
+    for i in range(0, len(jobids), window):
+        futures = [
+            (jobid, flux.job.job_list_id(conn, jobid, attrs))
+            for jobid in jobids[i : i + window]
+        ]
+        timer.count("rpcs", len(futures))
+        for jobid, future in futures:
+            try:
+                job = JobRecord(future.get_job())
+            except FileNotFoundError:
+                table.pop(jobid, None)
+                continue
+            if job_filter(job):
+                table[job.id] = job
+            else:
+                table.pop(job.id, None)
 
 
 def main(parsedargs):
+    import datetime
+    import itertools
+    import logging
+    import time
+
+    import flux.hostlist
+    import flux.job
+
+    from fluxwrappers.cache import JobCache
+    from fluxwrappers.connection import connect
+    from fluxwrappers import output as joboutput
+    from fluxwrappers.format import SlurmFormatter
+    from fluxwrappers.jobids import read_ids
+    from fluxwrappers.output import write_lines
+    from fluxwrappers.record import records
+    from fluxwrappers.states import SQUEUE_STATES, listed_states
+    from fluxwrappers.table import JobTable
+
     args, unknown_args = parsedargs
     myname = os.path.basename(__file__)
+    timer = timing.current()
     logging.basicConfig(level=args.loglevel, format="%(message)s")
     if unknown_args:
         logging.warning(
@@ -220,22 +337,7 @@ def main(parsedargs):
 
     # Validate explicit job state if given.
     if args.state is not None:
-        known_states = {
-            "running": "running",
-            "r": "running",
-            "pending": "pending",
-            "pd": "pending",
-            "all": "active,inactive",
-            "f": "failed",
-            "cg": "cleanup",
-            "completing": "cleanup",
-            "ca": "canceled",
-            "cancelled": "canceled",
-            "to": "timeout",
-            "timeout": "timeout",
-            "cd": "completed",
-            "completed": "completed",
-        }
+        known_states = SQUEUE_STATES
 
         # Normalize and search for state in known states.
         if args.state.lower() in known_states.keys():
@@ -248,13 +350,18 @@ def main(parsedargs):
             )
             exit(1)
 
-    # Start with an empty list of job ids and append ids if explicity
-    # defined by the user as an argument.
+    # Ids given with -j, possibly thousands of them from files or stdin, are
+    # read as they are looked up. Only -i keeps the whole list, to follow
+    # the listed jobs.
     job_ids = []
     if args.jobs is not None:
-        for id in args.jobs.split(","):
-            job_ids.append(flux.job.JobID(id))
-            flux_command += " " + id
+        flux_command += " " + args.jobs.replace(",", " ")
+        if args.iterate is not None:
+            try:
+                job_ids = [flux.job.JobID(id) for id in read_ids(args.jobs)]
+            except (OSError, ValueError) as err:
+                logging.error(f"{myname}: error: Invalid job id specified: {err}")
+                exit(1)
 
     # queues
     queue = ""
@@ -268,22 +375,102 @@ def main(parsedargs):
         job_name = args.name
         flux_command += f" --name={job_name}"
 
+    # Validate the sort specification, e.g. "-t,P,u".
+    sort_keys = None
+    if args.sort is not None:
+        try:
+            sort_keys = JobTable.parse_sort(args.sort)
+        except ValueError as err:
+            logging.error(f"{myname}: error: Invalid sort specification: {err}")
+            exit(1)
+
+    # Only request the job attributes needed by the output format, the sort
+    # keys and the filters applied below, so job-list does not serialize
+    # every attribute of every job. In iterate mode the filters are also
+    # applied here to jobs looked up one at a time.
+    formatter = SlurmFormatter()
+    output = None
+    if args.output is not None:
+        try:
+            fields = joboutput.parse_fields(args.fields)
+        except ValueError as err:
+            logging.error(f"{myname}: error: Invalid output field: {err}")
+            logging.error(
+                f"{myname}: error: Valid fields include: {','.join(joboutput.FIELDS)}"
+            )
+            exit(1)
+        if args.recursive and args.fields is None:
+            fields.insert(0, "instance")
+        output = (args.output, fields)
+        attrs = joboutput.get_attrs(fields)
+    elif args.summarize:
+        attrs = list(JobTable.summary_attrs)
+    else:
+        attrs = formatter.get_attrs(args.format, listed_states(job_states))
+    for key, _ in sort_keys or []:
+        for attr in JobTable.sort_attrs[key]:
+            if attr not in attrs:
+                attrs.append(attr)
+    if args.nodelist is not None and "nodelist" not in attrs:
+        attrs.append("nodelist")
+    if args.recursive:
+        # Child instances are found from the running jobs that publish a URI.
+        if args.iterate is not None:
+            logging.error(f"{myname}: error: --recursive cannot be used with -i")
+            exit(1)
+        if args.max_connections < 1:
+            logging.error(f"{myname}: error: --max-connections must be at least 1")
+            exit(1)
+        for attr in ["userid", "state", "annotations"]:
+            if attr not in attrs:
+                attrs.append(attr)
+    if args.iterate is not None or args.jobs is not None:
+        for attr in ["userid", "state", "result", "queue", "name"]:
+            if attr not in attrs:
+                attrs.append(attr)
+
+    # Retrieve a list of jobs and attributes from flux. Jobs given with -j are
+    # looked up by id below, otherwise flux will return a full list of all
+    # jobs matching the other filters we've specified.
+    # When no jobs are filtered out or reordered on this side, --max-count is
+    # applied by job-list as well. Jobs given by id and the -i table are
+    # looked up and filtered here, so they are not limited by job-list.
+    max_entries = 0
+    if (
+        args.max_count is not None
+        and args.iterate is None
+        and args.jobs is None
+        and args.nodelist is None
+        and sort_keys is None
+        and not args.summarize
+    ):
+        max_entries = args.max_count
+    query = dict(
+        attrs=attrs,
+        user=user,
+        queue=queue,
+        name=job_name,
+        filters=job_states,
+        max_entries=max_entries,
+    )
+
+    # Use a recent snapshot of the same query if the on-node cache is enabled,
+    # in which case flux is not contacted at all.
+    cache = None
+    job_dicts = None
+    if args.iterate is None and args.jobs is None and not args.no_cache:
+        cache = JobCache.from_environment()
+    if cache is not None:
+        with timer.phase("cache"):
+            job_dicts = cache.get(query)
+
     # Initialize a connection to flux.
-    conn = flux.Flux()
-
-    # Retrieve a list of jobs and attributes from flux. If job_ids is not empty
-    # the search will be limited to the jobs specified. Otherwise flux will
-    # return a full list of all jobs matching the other filters we've specified.
-    rpc = flux.job.JobList(
-        conn, user=user, ids=job_ids, queue=queue, name=job_name, filters=job_states
-    ).fetch_jobs()
-    jobs = list(rpc.get_jobinfos())
-
-    # Further filter jobs so that all jobs are running on a node in
-    # args.nodelist if a nodelist was specified by the user.
-    if args.nodelist is not None:
-        nodelist = flux.hostlist.Hostlist(args.nodelist)
-        jobs = filter_byhostlist(jobs, nodelist)
+    conn = None
+    joblist = None
+    if job_dicts is None:
+        with timer.phase("connect"):
+            conn = connect()
+        joblist = flux.job.JobList(conn, **query)
 
     # If run with very verbose, show equivalent flux commands to what we
     # are showing in fsqueue.
@@ -300,25 +487,137 @@ def main(parsedargs):
     logging.info("-----------------------------")
     logging.info("")
     logging.info("")
-    logging.info(datetime.datetime.now().strftime("%a %b %d %H:%M:%S %Y"))
-    logging.info(f"last_update_time={int(time.time())} records={len(jobs)}")
-
-    formatter = SlurmFormatter()
 
     unknown_tokens = formatter.get_unknown_tokens(args.format)
     for token in unknown_tokens:
         logging.error(f"{myname}: error: Invalid job format specification: {token[1]}")
 
-    if args.noheader is False:
-        headers_dict = formatter.get_header_dict()
-        print(formatter.format(args.format, headers_dict))
+    # Parse the format string once and reuse the plan for every row.
+    plan = formatter.compile(args.format)
 
-    for job in jobs:
-        job_dict = formatter.get_job_dict(job)
-        print(formatter.format(args.format, job_dict))
+    # Stop quietly, without reading further jobs, if the reader of our
+    # output goes away (e.g. squeue | head).
+    try:
+        if args.iterate is not None:
+            job_filter = make_job_filter(
+                user, job_states, job_ids, queue, job_name, args.nodelist
+            )
+            iterate(
+                conn,
+                args,
+                formatter,
+                plan,
+                joblist,
+                user,
+                job_ids,
+                attrs,
+                job_filter,
+                sort_keys,
+                output,
+            )
+            return
+
+        # Jobs are passed through the filter and formatter one at a time as
+        # they are consumed by the writer, so nothing is held beyond the
+        # response.
+        if args.jobs is not None:
+            # Jobs given by id are listed in the order given, in any state
+            # unless -t was given, with the other filters applied here.
+            job_filter = make_job_filter(
+                user,
+                job_states if args.state is not None else ["active", "inactive"],
+                [],
+                queue,
+                job_name,
+                None,
+            )
+            jobs = lookup_byid(conn, read_ids(args.jobs), attrs)
+            jobs = filter(job_filter, timer.wrap("fetch", jobs, count="jobs"))
+        else:
+            if job_dicts is None:
+                with timer.phase("fetch"):
+                    rpc = joblist.fetch_jobs()
+                    rpc.wait_for()
+                timer.count("rpcs")
+                with timer.phase("decode"):
+                    job_dicts = rpc.get_jobs()
+                if cache is not None:
+                    with timer.phase("cache"):
+                        cache.put(query, job_dicts)
+            jobs = timer.wrap("decode", records(job_dicts), count="jobs")
+
+        # List the same jobs in the instances running as the listed jobs,
+        # and in the instances running in those, concurrently. Instances
+        # that cannot be listed are reported and skipped.
+        if args.recursive:
+            from fluxwrappers.instances import list_instances
+
+            jobs = list(jobs)
+            with timer.phase("instances"):
+                listings = sorted(
+                    list_instances(
+                        jobs, query, args.max_connections, args.instance_timeout
+                    ),
+                    key=lambda listing: listing[0],
+                )
+            for instance, instance_jobs, error in listings:
+                timer.count("instances")
+                if error is not None:
+                    logging.warning(f"{myname}: warning: {instance}: {error}")
+                jobs.extend(instance_jobs)
+
+        # Further filter jobs so that all jobs are running on a node in
+        # args.nodelist if a nodelist was specified by the user.
+        if args.nodelist is not None:
+            nodelist = flux.hostlist.Hostlist(args.nodelist)
+            jobs = timer.wrap("filter", filter_byhostlist(jobs, nodelist))
+
+        # Summaries and sorts need every job, so the jobs are loaded into a
+        # columnar table with only the columns that are used.
+        if args.summarize:
+            with timer.phase("sort"):
+                table = JobTable(jobs, JobTable.summary_columns)
+                lines = JobTable.format_summary(table.summarize())
+            with timer.phase("write"):
+                write_lines(lines[1:] if args.noheader else lines)
+            return
+        if sort_keys is not None:
+            with timer.phase("sort"):
+                table = JobTable(jobs, JobTable.sort_columns(sort_keys))
+                order = table.order(sort_keys)
+            jobs = (table.jobs[row] for row in order)
+
+        if args.max_count is not None:
+            jobs = itertools.islice(jobs, args.max_count)
+
+        logging.info(datetime.datetime.now().strftime("%a %b %d %H:%M:%S %Y"))
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            # The record count is only known once all jobs have been read.
+            jobs = list(jobs)
+            logging.info(f"last_update_time={int(time.time())} records={len(jobs)}")
+
+        print_jobs(
+            formatter,
+            plan,
+            jobs,
+            args.noheader,
+            output=output,
+            instances=args.recursive,
+        )
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
 
 
 if __name__ == "__main__":
+    from fluxwrappers import server
+
+    # Run in the resident server if there is one, see fluxwrappers/server.py.
+    status = server.forward(__file__, sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
 
     def fmt(prog):
         return CustomHelpFormatter(prog)
@@ -343,7 +642,7 @@ if __name__ == "__main__":
         "-j",
         "--jobs",
         metavar="<jobid>,<jobid>,....",
-        help="display only jobs specified",
+        help="display only jobs specified, @file reads ids from file and - from stdin",
     )
 
     parser.add_argument(
@@ -371,7 +670,7 @@ if __name__ == "__main__":
         help="report details of script actions",
         action="store_const",
         dest="loglevel",
-        const=logging.INFO,
+        const="INFO",
     )
 
     parser.add_argument(
@@ -380,7 +679,7 @@ if __name__ == "__main__":
         help="show equivalent flux commands",
         action="store_const",
         dest="loglevel",
-        const=logging.DEBUG,
+        const="DEBUG",
     )
 
     parser.add_argument(
@@ -391,4 +690,117 @@ if __name__ == "__main__":
         "-n", "--name", metavar="<job_name>", help="show jobs named job_name"
     )
 
-    main(parser.parse_known_args())
+    parser.add_argument(
+        "-i",
+        "--iterate",
+        metavar="<seconds>",
+        type=float,
+        help="repeat the report every <seconds> seconds",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always query flux, even if a cached job list is available",
+    )
+
+    parser.add_argument(
+        "--max-count",
+        metavar="<count>",
+        type=int,
+        help="show at most count jobs",
+    )
+
+    parser.add_argument(
+        "-S",
+        "--sort",
+        metavar="<sort_list>",
+        help="comma separated list of fields to sort by, e.g. -t,P,u",
+    )
+
+    parser.add_argument(
+        "--recursive",
+        "--all-instances",
+        action="store_true",
+        help="also list jobs of the Flux instances running as listed jobs",
+    )
+
+    parser.add_argument(
+        "--max-connections",
+        metavar="<count>",
+        type=int,
+        default=8,
+        help="with --recursive, query at most count instances at once",
+    )
+
+    parser.add_argument(
+        "--instance-timeout",
+        metavar="<seconds>",
+        type=float,
+        default=10.0,
+        help="with --recursive, skip instances that do not answer in time",
+    )
+
+    outputs = parser.add_mutually_exclusive_group()
+
+    outputs.add_argument(
+        "--summarize",
+        action="store_true",
+        help="show job counts by partition and state instead of jobs",
+    )
+
+    outputs.add_argument(
+        "--json",
+        action="store_const",
+        dest="output",
+        const="json",
+        help="write jobs as a JSON document",
+    )
+
+    outputs.add_argument(
+        "--ndjson",
+        action="store_const",
+        dest="output",
+        const="ndjson",
+        help="write one JSON object per job and line",
+    )
+
+    outputs.add_argument(
+        "--csv",
+        action="store_const",
+        dest="output",
+        const="csv",
+        help="write jobs as comma separated values",
+    )
+
+    parser.add_argument(
+        "--fields",
+        metavar="<field>,<field>,...",
+        help="fields written by --json, --ndjson and --csv (default: all)",
+    )
+
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="report where the time was spent on stderr",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        metavar="<file>",
+        help="write cProfile statistics to file",
+    )
+
+    # Sort lists may start with "-" (descending), which argparse would
+    # otherwise take for an option.
+    argv = sys.argv[1:]
+    for i, arg in enumerate(argv[:-1]):
+        if arg in ("-S", "--sort") and argv[i + 1].startswith("-"):
+            argv[i : i + 2] = [f"--sort={argv[i + 1]}"]
+            break
+
+    parsedargs = parser.parse_known_args(argv)
+    with timing.Timer.from_environment(
+        os.path.basename(__file__), parsedargs[0].timing, parsedargs[0].cprofile
+    ):
+        main(parsedargs)